@@ -6,7 +6,7 @@ from logging.config import fileConfig
 from urllib.parse import urlparse, urlunparse
 from alembic import context
 from sqlalchemy import create_engine, pool
-from app.core.config import settings
+from app.core.config import get_settings
 from app.core.db import Base
 from app.query_service.models import Request
 
@@ -16,7 +16,9 @@ if config.config_file_name is not None:
 
 
 def get_sync_url():
-    parsed = urlparse(settings.DB_URL)
+    # `alembic -x db_url=<async url> upgrade head` migrates one shard from DB_SHARD_URLS.
+    db_url = context.get_x_argument(as_dictionary=True).get("db_url") or get_settings().DB_URL
+    parsed = urlparse(db_url)
     if "+asyncpg" not in parsed.scheme:
         raise ValueError("DB_URL must use asyncpg driver")
     return urlunparse(parsed._replace(scheme=parsed.scheme.replace("+asyncpg", "+psycopg2")))
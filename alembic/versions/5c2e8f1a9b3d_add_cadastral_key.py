@@ -0,0 +1,99 @@
+"""add normalized cadastral key
+
+Lossy: the upgrade rewrites parsable `cadastral_number` values in place to their canonical
+form and keeps no copy of the original spelling, so `downgrade()` restores the schema but not
+the original values. Back up the `requests` table first if the exact spellings matter.
+
+Revision ID: 5c2e8f1a9b3d
+Revises: 97ab4d8d9dca
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import re
+from typing import Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8f1a9b3d'
+down_revision: Union[str, Sequence[str], None] = '97ab4d8d9dca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+requests = sa.table(
+    'requests',
+    sa.column('id', sa.Integer()),
+    sa.column('cadastral_number', sa.String(length=128)),
+    sa.column('cadastral_key', sa.BigInteger()),
+)
+
+
+# Frozen copy of the parser and bit layout as of this revision, so later changes to
+# app.query_service.cadastral cannot change what this migration writes.
+_SEPARATORS = re.compile(r"[\s:.\-/_]+")
+_AREA_BITS = 7
+_QUARTER_BITS = 24
+_PARCEL_BITS = 25
+
+
+def _canonical_and_key(value: str) -> Optional[Tuple[str, int]]:
+    """Canonical `district:area:quarter:parcel` text and packed key, or `None` when `value` does not parse."""
+    parts = [p for p in _SEPARATORS.split(value.strip()) if p]
+    if len(parts) != 4 or not all(p.isdigit() for p in parts):
+        return None
+    district, area, quarter, parcel = (int(p) for p in parts)
+    if district > 99 or area > 99 or quarter > 9_999_999 or parcel >= 1 << _PARCEL_BITS:
+        return None
+    key = ((((district << _AREA_BITS) | area) << _QUARTER_BITS | quarter) << _PARCEL_BITS) | parcel
+    return f"{district:02d}:{area:02d}:{quarter:07d}:{parcel}", key
+
+
+def _backfill() -> None:
+    """Canonicalize existing numbers in place (original spellings are lost) and fill their packed keys; unparsable legacy rows keep a NULL key."""
+    bind = op.get_bind()
+    update = (
+        sa.update(requests)
+        .where(requests.c.id == sa.bindparam('_id'))
+        .values(cadastral_number=sa.bindparam('_number'), cadastral_key=sa.bindparam('_key'))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(requests.c.id, requests.c.cadastral_number)
+            .where(requests.c.id > last_id)
+            .order_by(requests.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            parsed = _canonical_and_key(row.cadastral_number)
+            if parsed is not None:
+                params.append({'_id': row.id, '_number': parsed[0], '_key': parsed[1]})
+        if params:
+            bind.execute(update, params)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('requests', sa.Column('cadastral_key', sa.BigInteger(), nullable=True))
+    _backfill()
+    op.drop_index(op.f('ix_requests_id'), table_name='requests')
+    op.drop_index('ix_requests_cadastral_number_created_at', table_name='requests')
+    op.drop_index(op.f('ix_requests_cadastral_number'), table_name='requests')
+    op.create_index('ix_requests_cadastral_key_created_at', 'requests', ['cadastral_key', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema; numbers stay in canonical form, the original spellings cannot be restored."""
+    op.drop_index('ix_requests_cadastral_key_created_at', table_name='requests')
+    op.create_index(op.f('ix_requests_cadastral_number'), 'requests', ['cadastral_number'], unique=False)
+    op.create_index('ix_requests_cadastral_number_created_at', 'requests', ['cadastral_number', 'created_at'], unique=False)
+    op.create_index(op.f('ix_requests_id'), 'requests', ['id'], unique=False)
+    op.drop_column('requests', 'cadastral_key')
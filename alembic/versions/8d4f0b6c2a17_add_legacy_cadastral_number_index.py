@@ -0,0 +1,38 @@
+"""index legacy cadastral numbers without a key
+
+Rows whose number does not parse keep a NULL `cadastral_key` and are looked up by the raw
+`cadastral_number`; a partial index keeps those lookups off a full table scan while staying
+tiny, since almost every row has a key.
+
+Revision ID: 8d4f0b6c2a17
+Revises: c41d7a2e6f80
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4f0b6c2a17'
+down_revision: Union[str, Sequence[str], None] = 'c41d7a2e6f80'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_requests_legacy_number_created_at',
+        'requests',
+        ['cadastral_number', 'created_at'],
+        unique=False,
+        postgresql_where=sa.text('cadastral_key IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_requests_legacy_number_created_at', table_name='requests')
@@ -0,0 +1,47 @@
+"""create latest results table
+
+Revision ID: c41d7a2e6f80
+Revises: 5c2e8f1a9b3d
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7a2e6f80'
+down_revision: Union[str, Sequence[str], None] = '5c2e8f1a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('latest_results',
+    sa.Column('cadastral_key', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('cadastral_number', sa.String(length=128), nullable=False),
+    sa.Column('request_id', sa.Integer(), nullable=False),
+    sa.Column('success', sa.Boolean(), nullable=True),
+    sa.Column('response', sa.JSON(), nullable=True),
+    sa.Column('requested_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('cadastral_key')
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        # Seed from history: newest finished request per number, walked via ix_requests_cadastral_key_created_at.
+        op.execute(
+            """
+            INSERT INTO latest_results (cadastral_key, cadastral_number, request_id, success, response, requested_at)
+            SELECT DISTINCT ON (cadastral_key) cadastral_key, cadastral_number, id, success, response, created_at
+            FROM requests
+            WHERE cadastral_key IS NOT NULL AND response IS NOT NULL AND created_at IS NOT NULL
+            ORDER BY cadastral_key, created_at DESC
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('latest_results')
@@ -0,0 +1,96 @@
+import asyncio
+import secrets
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.admission import admission
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.core.profiling import profiler, loop_lag, slow_requests
+from app.query_service.scheduler import get_scheduler
+from app.query_service.utils import get_hedger
+
+logger = get_logger("admin")
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Allow access only with the configured `ADMIN_TOKEN`; the admin surface is hidden when it is unset."""
+    settings = get_settings()
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/profiler/start", summary="Start sampling profiler", description="Samples the event loop thread for `duration` seconds.")
+async def profiler_start(
+        duration: float = Query(default=10.0, gt=0, le=3600),
+        interval_ms: float = Query(default=10.0, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """Start sampling the event loop thread."""
+    try:
+        profiler.start(duration=duration, interval=interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    logger.info("Profiler started", extra={"duration": duration, "interval_ms": interval_ms})
+    return profiler.status()
+
+
+@router.post("/profiler/stop", summary="Stop sampling profiler")
+async def profiler_stop() -> Dict[str, Any]:
+    """Stop the profiler before its duration elapses."""
+    await asyncio.to_thread(profiler.stop)
+    logger.info("Profiler stopped")
+    return profiler.status()
+
+
+@router.get("/profiler", summary="Profiler status")
+async def profiler_status() -> Dict[str, Any]:
+    """Return whether the profiler runs and how many samples it holds."""
+    return profiler.status()
+
+
+@router.get("/profiler/result", response_class=PlainTextResponse, summary="Download collapsed stacks")
+async def profiler_result() -> PlainTextResponse:
+    """Return samples in collapsed-stack format (flamegraph.pl / speedscope)."""
+    return PlainTextResponse(profiler.collapsed(), headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'})
+
+
+@router.get("/loop-lag", summary="Event loop lag")
+async def loop_lag_snapshot() -> Dict[str, float]:
+    """Return current, p99 and max event loop lag in seconds."""
+    return loop_lag.snapshot()
+
+
+@router.get("/slow-requests", summary="Slowest requests")
+async def slow_requests_snapshot() -> List[Dict[str, Any]]:
+    """Return the slowest `/query` and `/history` calls with per-stage timings."""
+    return slow_requests.snapshot()
+
+
+@router.delete("/slow-requests", summary="Reset slow request buffer")
+async def slow_requests_clear() -> Dict[str, str]:
+    """Drop recorded slow requests."""
+    slow_requests.clear()
+    return {"status": "ok"}
+
+
+@router.get("/external", summary="Outbound call scheduling")
+async def external_snapshot() -> Dict[str, Any]:
+    """Return per-client outbound queue depth and wait times, and hedging counters."""
+    scheduler, hedger = get_scheduler(), get_hedger()
+    return {
+        "scheduler": scheduler.stats() if scheduler is not None else None,
+        "hedging": hedger.stats.as_dict() if hedger is not None else None,
+    }
+
+
+@router.get("/admission", summary="Admission control")
+async def admission_snapshot() -> Dict[str, Any]:
+    """Return load-shedding signals and admitted/shed counters."""
+    return admission.snapshot()
@@ -0,0 +1,125 @@
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.db import pool_wait
+from app.core.logging import get_logger
+from app.core.profiling import loop_lag
+from app.query_service.scheduler import get_scheduler
+
+logger = get_logger("admission")
+
+CRITICAL = "critical"
+READ = "read"
+QUERY = "query"
+
+
+class AdmissionController:
+    """Decides whether a request may start, based on event loop lag, in-flight queries,
+    DB pool wait and outbound queue depth.
+
+    New `/query` calls, which hold a connection and an outbound slot for seconds, are shed
+    first. History and latest reads are shed only once loop lag or DB wait exceed their limit
+    by `read_headroom`. Health checks and the admin surface are always admitted. A limit of
+    0 disables that signal.
+    """
+
+    def __init__(
+            self,
+            enabled: bool = False,
+            max_inflight_queries: int = 200,
+            max_loop_lag: float = 0.2,
+            max_db_wait: float = 0.5,
+            max_outbound_queue: int = 100,
+            read_headroom: float = 2.0,
+            retry_after: int = 1,
+    ):
+        self.enabled = enabled
+        self.max_inflight_queries = max_inflight_queries
+        self.max_loop_lag = max_loop_lag
+        self.max_db_wait = max_db_wait
+        self.max_outbound_queue = max_outbound_queue
+        self.read_headroom = read_headroom
+        self.retry_after = retry_after
+        self.inflight_queries = 0
+        self.admitted: Counter = Counter()
+        self.shed: Counter = Counter()
+
+    @staticmethod
+    def classify(method: str, path: str) -> str:
+        if path == "/query" and method == "POST":
+            return QUERY
+        if path.startswith(("/history", "/latest")):
+            return READ
+        return CRITICAL
+
+    def check(self, request_class: str) -> Optional[str]:
+        """Return why a request of `request_class` must be shed now, or `None` to admit it."""
+        if not self.enabled or request_class == CRITICAL:
+            return None
+        factor = self.read_headroom if request_class == READ else 1.0
+        if self.max_loop_lag and loop_lag.current > self.max_loop_lag * factor:
+            return "loop_lag"
+        if self.max_db_wait and pool_wait.current > self.max_db_wait * factor:
+            return "db_pool_wait"
+        if request_class == QUERY:
+            if self.max_inflight_queries and self.inflight_queries >= self.max_inflight_queries:
+                return "inflight_queries"
+            scheduler = get_scheduler()
+            if self.max_outbound_queue and scheduler is not None and scheduler.queued >= self.max_outbound_queue:
+                return "outbound_queue"
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        scheduler = get_scheduler()
+        return {
+            "enabled": self.enabled,
+            "signals": {
+                "loop_lag": loop_lag.current,
+                "db_pool_wait": pool_wait.current,
+                "inflight_queries": self.inflight_queries,
+                "outbound_queue": scheduler.queued if scheduler is not None else 0,
+            },
+            "admitted": dict(self.admitted),
+            "shed": {f"{request_class}:{reason}": count for (request_class, reason), count in self.shed.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware answering 503 with `Retry-After` to requests the controller sheds."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_class = self.controller.classify(scope["method"], scope["path"])
+        reason = self.controller.check(request_class)
+        if reason is not None:
+            self.controller.shed[(request_class, reason)] += 1
+            logger.debug("Request shed", extra={"path": scope["path"], "reason": reason})
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": {"message": "Service overloaded, retry later", "reason": reason}},
+                headers={"Retry-After": str(self.controller.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.controller.admitted[request_class] += 1
+        if request_class != QUERY:
+            await self.app(scope, receive, send)
+            return
+        self.controller.inflight_queries += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.inflight_queries -= 1
+
+
+admission = AdmissionController()
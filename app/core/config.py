@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -13,12 +14,49 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
 
+    DB_SHARD_URLS: List[str] = []
+
     EXTERNAL_SERVICE_URL: str
 
+    REQUEST_TIMEOUT_SECONDS: float = 60.0
+
+    EXTERNAL_HEDGE_ENABLED: bool = False
+    EXTERNAL_HEDGE_PERCENTILE: float = 95.0
+    EXTERNAL_HEDGE_BUDGET: float = 0.05
+    EXTERNAL_HEDGE_MIN_DELAY_MS: int = 50
+    EXTERNAL_HEDGE_MIN_SAMPLES: int = 20
+
+    EXTERNAL_MAX_CONNECTIONS: int = 0
+    EXTERNAL_POOL_TIMEOUT_SECONDS: float = 5.0
+
+    EXTERNAL_MAX_CONCURRENCY: int = 0
+    SCHEDULER_CLIENT_WEIGHTS: Dict[str, float] = {}
+    SCHEDULER_BULK_SHARE: float = 0.1
+    SCHEDULER_MAX_CLIENTS: int = 10000
+
     LOG_LEVEL: str
     LOG_JSON: bool
     LOG_NAME: str
 
+    ADMIN_TOKEN: Optional[str] = None
+    PROFILING_SLOW_REQUESTS: int = 50
+    PROFILING_LOOP_LAG_INTERVAL_MS: int = 500
+
+    LATEST_CACHE_SIZE: int = 10000
+    LATEST_CACHE_TTL_SECONDS: float = 5.0
+
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_MAX_BATCH: int = 100
+    GROUP_COMMIT_MAX_DELAY_MS: int = 5
+
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_MAX_INFLIGHT_QUERIES: int = 200
+    ADMISSION_MAX_LOOP_LAG_MS: int = 200
+    ADMISSION_MAX_DB_WAIT_MS: int = 500
+    ADMISSION_MAX_OUTBOUND_QUEUE: int = 100
+    ADMISSION_READ_HEADROOM: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
     @property
     def DB_URL(self) -> str:
         """Build the async PostgreSQL DSN string."""
@@ -30,4 +68,25 @@ class Settings(BaseSettings):
     model_config = ConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
-settings = Settings()
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Return process settings, reading the environment on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def set_settings(settings: Optional[Settings]) -> None:
+    """Install explicit settings (e.g. from `create_app`), or reset to lazy loading with `None`."""
+    global _settings
+    _settings = settings
+
+
+def __getattr__(name: str):
+    # `from app.core.config import settings` keeps working but no longer runs at import time.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,30 +1,169 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+from typing import Callable, List, Optional
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from app.core.config import settings
+from app.core.config import get_settings
 from app.core.logging import get_logger
 
 Base = declarative_base()
 
-engine = create_async_engine(settings.DB_URL, echo=True, future=True)
-
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
-)
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_shard_engines: List[AsyncEngine] = []
+_shard_sessionmakers: Optional[List[async_sessionmaker]] = None
 
 logger = get_logger("db")
 
 
+class PoolWaitTracker:
+    """Exponentially weighted average of how long requests wait for a pooled connection.
+
+    The average also halves every `half_life` seconds without new observations, so a
+    signal used to shed load cannot stay stuck once requests stop reaching the pool.
+    Time is read from `clock`, `time.monotonic` by default.
+    """
+
+    def __init__(self, alpha: float = 0.2, half_life: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.alpha = alpha
+        self.half_life = half_life
+        self.clock = clock
+        self.max_wait = 0.0
+        self._value = 0.0
+        self._updated_at = clock()
+
+    @property
+    def current(self) -> float:
+        return self._value * 0.5 ** ((self.clock() - self._updated_at) / self.half_life)
+
+    def observe(self, seconds: float) -> None:
+        current = self.current
+        self._value = current + self.alpha * (seconds - current)
+        self._updated_at = self.clock()
+        self.max_wait = max(self.max_wait, seconds)
+
+
+pool_wait = PoolWaitTracker()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool reporting how long each checkout waited (including connecting) to `pool_wait`."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - started)
+
+
+def get_engine() -> AsyncEngine:
+    """Return the process-wide async engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(get_settings().DB_URL, echo=True, future=True, poolclass=TimedQueuePool)
+    return _engine
+
+
+def get_sessionmaker() -> async_sessionmaker:
+    """Return the session factory bound to `get_engine()`."""
+    global _sessionmaker
+    if _sessionmaker is None:
+        _sessionmaker = async_sessionmaker(
+            bind=get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False,
+        )
+    return _sessionmaker
+
+
+def get_shard_sessionmakers() -> List[async_sessionmaker]:
+    """Return one session factory per `DB_SHARD_URLS` entry (empty when sharding is off)."""
+    global _shard_sessionmakers
+    if _shard_sessionmakers is None:
+        for url in get_settings().DB_SHARD_URLS:
+            _shard_engines.append(create_async_engine(url, echo=True, future=True, poolclass=TimedQueuePool))
+        _shard_sessionmakers = [
+            async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False, autocommit=False)
+            for engine in _shard_engines
+        ]
+    return _shard_sessionmakers
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections and forget the engines so they can be recreated."""
+    global _engine, _sessionmaker, _shard_sessionmakers
+    if _engine is not None:
+        await _engine.dispose()
+    for engine in _shard_engines:
+        await engine.dispose()
+    _engine = None
+    _sessionmaker = None
+    _shard_engines.clear()
+    _shard_sessionmakers = None
+
+
+class LazySession:
+    """Stand-in for an `AsyncSession` that creates the real session on first use."""
+
+    def __init__(self, factory: Callable[[], AsyncSession]):
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self._factory()
+            logger.debug("DB session opened")
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            logger.debug("DB session closed")
+
+
 async def get_db() -> AsyncSession:
     """FastAPI dependency that yields an `AsyncSession`."""
-    async with AsyncSessionLocal() as session:
+    async with get_sessionmaker()() as session:
         logger.debug("DB session opened")
         try:
             yield session
         finally:
             await session.close()
             logger.debug("DB session closed")
+
+
+async def get_shard_dbs() -> List[AsyncSession]:
+    """FastAPI dependency that yields one `AsyncSession` per shard; connections are taken on first use."""
+    sessions = [factory() for factory in get_shard_sessionmakers()]
+    try:
+        yield sessions
+    finally:
+        for session in sessions:
+            await session.close()
+
+
+async def get_lazy_db() -> LazySession:
+    """FastAPI dependency like `get_db`, but the session (and engine) is created only if the request uses it."""
+    session = LazySession(lambda: get_sessionmaker()())
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_lazy_shard_dbs() -> List[LazySession]:
+    """FastAPI dependency like `get_shard_dbs`, but each shard session is created only if the request uses it."""
+    sessions = [LazySession(factory) for factory in get_shard_sessionmakers()]
+    try:
+        yield sessions
+    finally:
+        for session in sessions:
+            await session.close()
@@ -1,7 +1,6 @@
 import logging
 import sys
-from typing import Optional
-from app.core import settings
+from typing import Optional, Set, Tuple
 
 
 class JsonFormatter(logging.Formatter):
@@ -20,10 +19,19 @@ class JsonFormatter(logging.Formatter):
         return json.dumps(payload, ensure_ascii=False)
 
 
-def _build_handler() -> logging.Handler:
+class _StdoutHandler(logging.StreamHandler):
+    """Marker class for the handler installed by `configure_logging`."""
+
+
+_config: Optional[Tuple[int, bool]] = None
+_default_name = "app"
+_names: Set[str] = set()
+
+
+def _build_handler(json_format: bool) -> logging.Handler:
     """Create a stdout handler with configured formatter."""
-    handler = logging.StreamHandler(stream=sys.stdout)
-    if getattr(settings, "LOG_JSON", False):
+    handler = _StdoutHandler(stream=sys.stdout)
+    if json_format:
         handler.setFormatter(JsonFormatter())
     else:
         formatter = logging.Formatter(
@@ -34,16 +42,31 @@ def _build_handler() -> logging.Handler:
     return handler
 
 
+def _apply(logger: logging.Logger) -> None:
+    """Install the configured level and handler, replacing one installed earlier."""
+    level, json_format = _config
+    for handler in [h for h in logger.handlers if isinstance(h, _StdoutHandler)]:
+        logger.removeHandler(handler)
+    logger.setLevel(level)
+    logger.addHandler(_build_handler(json_format))
+    logger.propagate = False
+
+
+def configure_logging(level: str = "INFO", json_format: bool = False, name: str = "app") -> None:
+    """Configure all loggers obtained via `get_logger`, including ones created before this call."""
+    global _config, _default_name
+    _config = (getattr(logging, str(level).upper(), logging.INFO), json_format)
+    _default_name = name
+    for logger_name in _names:
+        _apply(logging.getLogger(logger_name))
+
+
 def get_logger(name: Optional[str] = None) -> logging.Logger:
-    """Get a configured logger, creating handlers only once."""
-    logger_name = name or getattr(settings, "LOG_NAME", "app")
+    """Get a logger; handlers are attached once `configure_logging` has run, so importing stays side-effect free."""
+    logger_name = name or _default_name
     logger = logging.getLogger(logger_name)
-    if not logger.handlers:
-        log_level_name = getattr(settings, "LOG_LEVEL", "INFO")
-        logger.setLevel(getattr(logging, str(log_level_name).upper(), logging.INFO))
-        handler = _build_handler()
-        logger.addHandler(handler)
-        logger.propagate = False
+    if logger_name not in _names:
+        _names.add(logger_name)
+        if _config is not None:
+            _apply(logger)
     return logger
-
-
@@ -0,0 +1,251 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("profiling_stages", default=None)
+_marks: ContextVar[Optional[Dict[str, float]]] = ContextVar("profiling_marks", default=None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Accumulate wall time of the enclosed block into the current request's stage timings."""
+    stages = _stages.get()
+    if stages is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def mark(name: str) -> None:
+    """Record the current time as point `name` of the current request's timeline."""
+    marks = _marks.get()
+    if marks is not None:
+        marks[name] = time.perf_counter()
+
+
+class ProfiledRoute(APIRoute):
+    """Route marking when its endpoint returns, so `SlowRequestMiddleware` can time serialization separately."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if asyncio.iscoroutinefunction(endpoint):
+            original = endpoint
+
+            @functools.wraps(original)
+            async def endpoint(*args: Any, **kw: Any) -> Any:
+                try:
+                    return await original(*args, **kw)
+                finally:
+                    mark("handler_done")
+
+        super().__init__(path, endpoint, **kwargs)
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler of one thread producing collapsed stacks."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._samples: Counter = Counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.interval: float = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: float, interval: float = 0.01, thread_id: Optional[int] = None) -> None:
+        """Sample `thread_id` (the caller's thread by default) every `interval` seconds for `duration` seconds."""
+        if self.running:
+            raise RuntimeError("profiler is already running")
+        target = thread_id if thread_id is not None else threading.get_ident()
+        self._samples = Counter()
+        self._stop.clear()
+        self.interval = interval
+        self.started_at = time.time()
+        self.finished_at = None
+        self._thread = threading.Thread(target=self._run, args=(target, duration, interval), name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling early and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, target: int, duration: float, interval: float) -> None:
+        deadline = time.monotonic() + duration
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename}:{code.co_name}")
+                    frame = frame.f_back
+                self._samples[";".join(reversed(stack))] += 1
+            self._stop.wait(interval)
+        self.finished_at = time.time()
+
+    def collapsed(self) -> str:
+        """Collected samples in flamegraph.pl collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._samples.most_common())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "interval": self.interval,
+            "samples": sum(self._samples.values()),
+        }
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a periodic timer."""
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def current(self) -> float:
+        return self.samples[-1] if self.samples else 0.0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def snapshot(self) -> Dict[str, float]:
+        ordered = sorted(self.samples)
+        return {
+            "current": self.current,
+            "p99": ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] if ordered else 0.0,
+            "max": self.max_lag,
+            "interval": self.interval,
+        }
+
+
+class SlowRequestRecorder:
+    """Keeps the `capacity` slowest requests seen, with their per-stage timings."""
+
+    def __init__(self, capacity: int = 50):
+        self.capacity = capacity
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(self, method: str, path: str, duration: float, status_code: Optional[int], stages: Dict[str, float]) -> None:
+        """Offer a finished request; it is kept only if it is among the slowest."""
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            if len(self._heap) >= self.capacity and duration <= self._heap[0][0]:
+                return
+            entry = {
+                "method": method,
+                "path": path,
+                "duration": duration,
+                "status_code": status_code,
+                "stages": dict(stages),
+                "finished_at": time.time(),
+            }
+            item = (duration, next(self._counter), entry)
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, item)
+            else:
+                heapq.heapreplace(self._heap, item)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._heap, key=lambda item: item[0], reverse=True)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware timing selected paths and feeding them to a `SlowRequestRecorder`.
+
+    Stage timings come from `stage()` blocks inside the request. For endpoints on a
+    `ProfiledRoute`, the time from the endpoint returning to the response start is reported as
+    `serialization`; the remainder is reported as `framework` (request parsing, dependencies).
+    """
+
+    def __init__(self, app, recorder: SlowRequestRecorder, path_prefixes: Tuple[str, ...] = ("/query", "/history")):
+        self.app = app
+        self.recorder = recorder
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        stages: Dict[str, float] = {}
+        marks: Dict[str, float] = {}
+        token = _stages.set(stages)
+        marks_token = _marks.set(marks)
+        started = time.perf_counter()
+        state: Dict[str, Any] = {"status": None, "response_started": None}
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["response_started"] = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _stages.reset(token)
+            _marks.reset(marks_token)
+            finished = time.perf_counter()
+            response_started = state["response_started"]
+            if response_started is not None:
+                handler_done = marks.get("handler_done", response_started)
+                stages["framework"] = max(0.0, handler_done - started - sum(stages.values()))
+                if "handler_done" in marks:
+                    stages["serialization"] = max(0.0, response_started - handler_done)
+            self.recorder.record(scope["method"], scope["path"], finished - started, state["status"], stages)
+
+
+profiler = SamplingProfiler()
+slow_requests = SlowRequestRecorder()
+loop_lag = LoopLagMonitor()
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+import httpx
+
+from app.query_service.utils import RequestHedger, LatencyTracker, ExternalServiceError, post_to_external_service
+
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run(client: httpx.AsyncClient, url: str, requests: int, concurrency: int, timeout: int, hedger: Optional[RequestHedger]) -> List[float]:
+    """Fire `requests` calls at the simulator and return per-call latencies."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        payload = {"cadastral_number": f"bench:{i}", "latitude": 0.0, "longitude": 0.0}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if hedger is None:
+                    await post_to_external_service(url, payload, timeout, client)
+                else:
+                    await hedger.call(lambda: post_to_external_service(url, payload, timeout, client))
+            except ExternalServiceError:
+                pass
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies
+
+
+def _report(label: str, latencies: List[float]) -> str:
+    return (
+        f"{label:<8} p50={_percentile(latencies, 50):.2f}s p95={_percentile(latencies, 95):.2f}s "
+        f"p99={_percentile(latencies, 99):.2f}s max={max(latencies):.2f}s"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        await _compare(client, args)
+
+
+async def _compare(client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+    baseline = await run(client, args.url, args.requests, args.concurrency, args.timeout, None)
+    print(_report("plain", baseline))
+
+    tracker = LatencyTracker(min_samples=min(20, len(baseline)))
+    for value in baseline:
+        tracker.observe(value)
+    # Start with a full budget (capped at the bucket's burst) so the run is not limited by warm-up.
+    hedger = RequestHedger(percentile=args.percentile, budget_ratio=args.budget, tracker=tracker, initial_budget=float("inf"))
+    hedged = await run(client, args.url, args.requests, args.concurrency, args.timeout, hedger)
+    print(_report("hedged", hedged))
+    print(f"hedge stats: {hedger.stats.as_dict()}")
+
+
+def main() -> None:
+    """Compare external call latency with and without hedging against the simulator."""
+    parser = argparse.ArgumentParser(description="Benchmark hedged requests against the external simulator.")
+    parser.add_argument("--url", default="http://localhost:8001/result")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=int, default=60)
+    parser.add_argument("--percentile", type=float, default=95.0)
+    parser.add_argument("--budget", type=float, default=0.05)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
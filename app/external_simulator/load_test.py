@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run(client: httpx.AsyncClient, url: str, rate: float, duration: float, slo: float) -> Dict[str, object]:
+    """Offer `rate` `/query` calls per second for `duration` seconds (open loop) and classify the outcomes."""
+    outcomes: Counter = Counter()
+    good: List[float] = []
+    shed: List[float] = []
+
+    async def one(i: int) -> None:
+        body = {"cadastral_number": f"77:01:{i % 9_999_999:07d}:1", "latitude": 0.0, "longitude": 0.0}
+        started = time.perf_counter()
+        try:
+            r = await client.post(url, json=body, headers={"X-Request-Timeout": str(slo)})
+        except httpx.HTTPError:
+            outcomes["client_error"] += 1
+            return
+        elapsed = time.perf_counter() - started
+        if r.status_code == 201 and elapsed <= slo:
+            outcomes["good"] += 1
+            good.append(elapsed)
+        elif r.status_code == 503:
+            outcomes["shed"] += 1
+            shed.append(elapsed)
+        else:
+            outcomes[str(r.status_code)] += 1
+
+    tasks = []
+    started = time.perf_counter()
+    for i in range(int(rate * duration)):
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i)))
+    await asyncio.gather(*tasks)
+    return {
+        "rate": rate,
+        "goodput": outcomes["good"] / duration,
+        "outcomes": dict(outcomes),
+        "good_p50": _percentile(good, 50),
+        "good_p99": _percentile(good, 99),
+        "shed_p99": _percentile(shed, 99),
+    }
+
+
+def _report(result: Dict[str, object]) -> str:
+    return (
+        f"offered={result['rate']:.0f}/s goodput={result['goodput']:.1f}/s "
+        f"p50={result['good_p50']:.2f}s p99={result['good_p99']:.2f}s shed_p99={result['shed_p99']:.3f}s "
+        f"outcomes={result['outcomes']}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+    async with httpx.AsyncClient(timeout=args.slo + 5, limits=limits) as client:
+        for multiplier in args.overload:
+            result = await run(client, args.url, args.capacity * multiplier, args.duration, args.slo)
+            print(f"x{multiplier:<4} {_report(result)}")
+            await asyncio.sleep(args.pause)
+
+
+def main() -> None:
+    """Measure `/query` goodput of a running query service (backed by the simulator) at increasing overload."""
+    parser = argparse.ArgumentParser(description="Open-loop load test of the query service.")
+    parser.add_argument("--url", default="http://localhost:8000/query")
+    parser.add_argument("--capacity", type=float, required=True, help="sustainable /query rate, e.g. EXTERNAL_MAX_CONCURRENCY / mean simulator delay")
+    parser.add_argument("--overload", type=float, nargs="+", default=[1, 2, 3, 5])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--slo", type=float, default=2.0, help="per-request deadline; slower successes do not count as goodput")
+    parser.add_argument("--pause", type=float, default=5.0, help="idle seconds between steps so queues drain")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,16 @@
 from fastapi import FastAPI
 import asyncio
+import os
 import random
 
 
 app = FastAPI(title="External Simulator")
 
+MAX_DELAY = float(os.getenv("SIMULATOR_MAX_DELAY", "60"))
+
 
 @app.post("/result")
 async def result() -> dict:
-    delay = random.uniform(0, 60)
+    delay = random.uniform(0, MAX_DELAY)
     await asyncio.sleep(delay)
     return {"success": bool(random.getrandbits(1))}
-
-
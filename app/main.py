@@ -1,19 +1,73 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
 from fastapi import FastAPI
 from app.query_service.routers import router as query_router
-from app.core.logging import get_logger
+from app.core.admin import router as admin_router
+from app.core.admission import AdmissionMiddleware, admission
+from app.core.config import Settings, get_settings, set_settings
+from app.core.db import get_engine, get_sessionmaker, get_shard_sessionmakers, dispose_engine
+from app.core.logging import get_logger, configure_logging
+from app.core.profiling import SlowRequestMiddleware, slow_requests, loop_lag
+from app.query_service.group_commit import start_group_commit_writer, stop_group_commit_writer
+from app.query_service.utils import start_http_client, stop_http_client
 
-app = FastAPI(title="Query Service")
 logger = get_logger("app")
 
-app.include_router(query_router)
-
 
-@app.on_event("startup")
-async def on_startup() -> None:
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create settings-dependent resources on startup and release them on shutdown."""
+    settings = get_settings()
+    configure_logging(settings.LOG_LEVEL, settings.LOG_JSON, settings.LOG_NAME)
     logger.info("Application startup")
 
+    get_engine()
+    get_shard_sessionmakers()
+    await start_http_client(
+        max_connections=settings.EXTERNAL_MAX_CONNECTIONS or None,
+        pool_timeout=settings.EXTERNAL_POOL_TIMEOUT_SECONDS,
+    )
+    slow_requests.capacity = settings.PROFILING_SLOW_REQUESTS
+    loop_lag.interval = settings.PROFILING_LOOP_LAG_INTERVAL_MS / 1000
+    await loop_lag.start()
+    admission.enabled = settings.ADMISSION_ENABLED
+    admission.max_inflight_queries = settings.ADMISSION_MAX_INFLIGHT_QUERIES
+    admission.max_loop_lag = settings.ADMISSION_MAX_LOOP_LAG_MS / 1000
+    admission.max_db_wait = settings.ADMISSION_MAX_DB_WAIT_MS / 1000
+    admission.max_outbound_queue = settings.ADMISSION_MAX_OUTBOUND_QUEUE
+    admission.read_headroom = settings.ADMISSION_READ_HEADROOM
+    admission.retry_after = settings.ADMISSION_RETRY_AFTER_SECONDS
+    if settings.GROUP_COMMIT_ENABLED and settings.DB_SHARD_URLS:
+        logger.warning("Group commit is not supported together with DB_SHARD_URLS; writes are committed per request")
+    elif settings.GROUP_COMMIT_ENABLED:
+        await start_group_commit_writer(
+            get_sessionmaker(),
+            max_batch=settings.GROUP_COMMIT_MAX_BATCH,
+            max_delay=settings.GROUP_COMMIT_MAX_DELAY_MS / 1000,
+        )
+        logger.info("Group commit writer started")
+    try:
+        yield
+    finally:
+        await stop_group_commit_writer()
+        await loop_lag.stop()
+        await stop_http_client()
+        await dispose_engine()
+        logger.info("Application shutdown")
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Build the application; settings, engine and HTTP client are created lazily in the lifespan."""
+    if settings is not None:
+        set_settings(settings)
+    app = FastAPI(title="Query Service", lifespan=lifespan)
+    app.include_router(query_router)
+    app.include_router(admin_router)
+    app.add_middleware(SlowRequestMiddleware, recorder=slow_requests)
+    # Added last so it runs first: shed requests never reach routing or the slow-request recorder.
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+    return app
 
-@app.on_event("shutdown")
-async def on_shutdown() -> None:
-    logger.info("Application shutdown")
 
+app = create_app()
@@ -0,0 +1,51 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with per-entry TTL.
+
+    The TTL bounds staleness when several processes write the same rows: writes made by
+    this process update the cache directly, writes made elsewhere become visible after `ttl`.
+    """
+
+    def __init__(self, capacity: int = 10000, ttl: float = 5.0):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh cached value or `None`."""
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Return fresh cached values for the subset of `keys` that is present."""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Insert or refresh `key`, evicting the least recently used entry when full."""
+        if self.capacity <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.capacity:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,62 @@
+import re
+from typing import NamedTuple, Optional
+
+_SEPARATORS = re.compile(r"[\s:.\-/_]+")
+
+# Bit layout of the packed key: district(7) | area(7) | quarter(24) | parcel(25) = 63 bits,
+# so every key fits a signed BIGINT and sorts like the (district, area, quarter, parcel) tuple.
+_AREA_BITS = 7
+_QUARTER_BITS = 24
+_PARCEL_BITS = 25
+
+MAX_DISTRICT = 99
+MAX_AREA = 99
+MAX_QUARTER = 9_999_999
+MAX_PARCEL = (1 << _PARCEL_BITS) - 1
+
+
+class CadastralNumber(NamedTuple):
+    """Parsed `district:area:quarter:parcel` cadastral number."""
+
+    district: int
+    area: int
+    quarter: int
+    parcel: int
+
+    @property
+    def canonical(self) -> str:
+        """Canonical text form, e.g. `77:01:0001001:1234`."""
+        return f"{self.district:02d}:{self.area:02d}:{self.quarter:07d}:{self.parcel}"
+
+    @property
+    def key(self) -> int:
+        """Compact 63-bit integer packing all four components."""
+        return (
+            (((self.district << _AREA_BITS) | self.area) << _QUARTER_BITS | self.quarter) << _PARCEL_BITS
+        ) | self.parcel
+
+
+def parse_cadastral_number(value: str) -> CadastralNumber:
+    """Parse a cadastral number tolerating spaces, `:`/`-`/`.`/`/` separators and leading zeros."""
+    parts = [p for p in _SEPARATORS.split(value.strip()) if p]
+    if len(parts) != 4 or not all(p.isdigit() for p in parts):
+        raise ValueError("cadastral_number must have the form district:area:quarter:parcel")
+    district, area, quarter, parcel = (int(p) for p in parts)
+    if district > MAX_DISTRICT or area > MAX_AREA or quarter > MAX_QUARTER or parcel > MAX_PARCEL:
+        raise ValueError("cadastral_number component out of range")
+    return CadastralNumber(district, area, quarter, parcel)
+
+
+def normalize_cadastral_number(value: str) -> str:
+    """Return the canonical form of `value`, raising `ValueError` when it cannot be parsed."""
+    return parse_cadastral_number(value).canonical
+
+
+def cadastral_key(value: Optional[str]) -> Optional[int]:
+    """Return the packed key of `value`, or `None` for legacy numbers that do not parse."""
+    if value is None:
+        return None
+    try:
+        return parse_cadastral_number(value).key
+    except ValueError:
+        return None
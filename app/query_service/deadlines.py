@@ -0,0 +1,32 @@
+import time
+from typing import Optional
+
+
+class Deadline:
+    """Absolute point in time by which a request must be finished."""
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        """Seconds left before expiry, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    @classmethod
+    def from_headers(cls, default_timeout: float, timeout_header: Optional[str] = None, deadline_header: Optional[str] = None) -> "Deadline":
+        """Build a deadline from `X-Request-Timeout` (seconds) and `X-Request-Deadline` (unix time) headers.
+
+        Clients may only shorten the server default; the earliest of all limits wins.
+        Raises `ValueError` for values that are not numbers.
+        """
+        timeout = default_timeout
+        if timeout_header is not None:
+            timeout = min(timeout, float(timeout_header))
+        if deadline_header is not None:
+            timeout = min(timeout, float(deadline_header) - time.time())
+        return cls(max(0.0, timeout))
@@ -1,16 +1,103 @@
-from fastapi import Depends
+import hashlib
+from typing import List, Optional
+from fastapi import Depends, Header, HTTPException, Request
 from app.query_service.services import RequestService
-from app.query_service.repositories import SQLAlchemyRequestRepository
-from app.core.db import get_db
+from app.query_service.repositories import (
+    SQLAlchemyRequestRepository,
+    GroupCommitRequestRepository,
+    GroupCommitLatestResultRepository,
+    SQLAlchemyLatestResultRepository,
+    ShardedRequestRepository,
+    ShardedLatestResultRepository,
+)
+from app.query_service.cache import LRUCache
+from app.query_service.group_commit import get_group_commit_writer
+from app.query_service.deadlines import Deadline
+from app.query_service.scheduler import ClientContext, PRIORITIES, INTERACTIVE, get_scheduler
+from app.core.config import get_settings
+from app.core.db import LazySession, get_lazy_db, get_lazy_shard_dbs, get_shard_dbs
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.logging import get_logger
 
 
 logger = get_logger("deps")
 
+_latest_cache: Optional[LRUCache] = None
 
-async def get_request_service(db: AsyncSession = Depends(get_db)) -> RequestService:
-    """Provide a `RequestService` bound to current DB session."""
-    repo = SQLAlchemyRequestRepository(db)
-    service = RequestService(repo)
-    return service
+
+def get_latest_cache() -> LRUCache:
+    """Process-wide hot set of latest results, sized from settings on first use."""
+    global _latest_cache
+    if _latest_cache is None:
+        settings = get_settings()
+        _latest_cache = LRUCache(capacity=settings.LATEST_CACHE_SIZE, ttl=settings.LATEST_CACHE_TTL_SECONDS)
+    return _latest_cache
+
+
+async def get_request_service(
+        db: LazySession = Depends(get_lazy_db),
+        shard_dbs: List[AsyncSession] = Depends(get_shard_dbs),
+) -> RequestService:
+    """Provide a `RequestService` bound to current DB session, or to per-shard sessions when sharding is on.
+
+    The default session is lazy, so with sharding on the unused `DB_URL` database is never touched.
+    """
+    if shard_dbs:
+        repo = ShardedRequestRepository([SQLAlchemyRequestRepository(s) for s in shard_dbs])
+        latest = ShardedLatestResultRepository([SQLAlchemyLatestResultRepository(s) for s in shard_dbs])
+        return RequestService(repo, latest, get_latest_cache(), get_scheduler())
+    writer = get_group_commit_writer()
+    if writer is not None:
+        repo, latest = GroupCommitRequestRepository(db, writer), GroupCommitLatestResultRepository(db, writer)
+    else:
+        repo, latest = SQLAlchemyRequestRepository(db), SQLAlchemyLatestResultRepository(db)
+    return RequestService(repo, latest, get_latest_cache(), get_scheduler())
+
+
+async def get_latest_service(
+        db: LazySession = Depends(get_lazy_db),
+        shard_dbs: List[LazySession] = Depends(get_lazy_shard_dbs),
+) -> RequestService:
+    """Provide a `RequestService` for `/latest` reads; sessions are created only when the hot set misses."""
+    if shard_dbs:
+        repo = ShardedRequestRepository([SQLAlchemyRequestRepository(s) for s in shard_dbs])
+        latest = ShardedLatestResultRepository([SQLAlchemyLatestResultRepository(s) for s in shard_dbs])
+    else:
+        repo, latest = SQLAlchemyRequestRepository(db), SQLAlchemyLatestResultRepository(db)
+    return RequestService(repo, latest, get_latest_cache())
+
+
+async def get_deadline(
+        x_request_timeout: Optional[str] = Header(default=None),
+        x_request_deadline: Optional[str] = Header(default=None),
+) -> Deadline:
+    """Build the request deadline from client headers, capped by the server default."""
+    try:
+        return Deadline.from_headers(get_settings().REQUEST_TIMEOUT_SECONDS, x_request_timeout, x_request_deadline)
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"message": "Invalid X-Request-Timeout or X-Request-Deadline header"})
+
+
+async def get_client_context(
+        http_request: Request,
+        x_client_id: Optional[str] = Header(default=None),
+        x_api_key: Optional[str] = Header(default=None),
+        x_request_priority: Optional[str] = Header(default=None),
+) -> ClientContext:
+    """Identify the caller for outbound fair scheduling: a digest of `X-API-Key`, else `X-Client-Id`, else the peer address.
+
+    The API key wins over the free-form `X-Client-Id`, so a keyed caller cannot claim a fresh
+    fair share by varying that header.
+    """
+    if x_api_key:
+        client_id = "key:" + hashlib.sha256(x_api_key.encode()).hexdigest()[:12]
+    elif x_client_id:
+        client_id = x_client_id
+    elif http_request.client is not None:
+        client_id = "ip:" + http_request.client.host
+    else:
+        client_id = "anonymous"
+    priority = (x_request_priority or INTERACTIVE).lower()
+    if priority not in PRIORITIES:
+        raise HTTPException(status_code=400, detail={"message": "Invalid X-Request-Priority header", "allowed": list(PRIORITIES)})
+    return ClientContext(client_id=client_id, priority=priority)
@@ -3,6 +3,11 @@ set -e
 
 echo "Running alembic migrations..."
 alembic upgrade head
+python -c "from app.core.config import get_settings; print('\n'.join(get_settings().DB_SHARD_URLS))" | while read -r shard_url; do
+  if [ -n "$shard_url" ]; then
+    alembic -x db_url="$shard_url" upgrade head
+  fi
+done
 
 echo "Starting FastAPI app..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000
@@ -0,0 +1,205 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logging import get_logger
+from app.query_service.models import Request, latest_results_upsert
+
+_table = Request.__table__
+
+_insert_stmt = insert(_table).returning(_table.c.id, _table.c.created_at, sort_by_parameter_order=True)
+_update_stmt = (
+    update(_table)
+    .where(_table.c.id == bindparam("_id"))
+    .values(response=bindparam("response"), success=bindparam("success"))
+)
+
+
+@dataclass
+class _Op:
+    kind: str
+    values: Dict[str, Any]
+    future: asyncio.Future
+    claimed: bool = False
+
+
+class GroupCommitWriter:
+    """Write-behind writer that flushes request inserts, result updates and latest-result upserts in shared transactions.
+
+    Operations queued by concurrent callers are collected for at most `max_delay` seconds or
+    `max_batch` operations and written in one transaction with multi-row statements.
+    Durability: a caller's future resolves only after that transaction has committed, so an
+    acknowledged write is as durable as a regular `commit()`; operations still queued when the
+    process dies are lost, but none of them was acknowledged. If a batch fails, its operations
+    are retried one transaction each so that every caller receives its own result or error.
+    Operations whose caller was cancelled before their batch started writing are dropped.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int = 100, max_delay: float = 0.005):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.logger = get_logger("group_commit")
+        self._queue: asyncio.Queue[Optional[_Op]] = asyncio.Queue()
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self._runner is None:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush pending operations and stop the background loop."""
+        if self._runner is None:
+            return
+        runner, self._runner = self._runner, None
+        self._queue.put_nowait(None)
+        await runner
+
+    async def insert(self, values: Dict[str, Any], on_commit: Optional[Callable[[int, datetime], None]] = None) -> Tuple[int, datetime]:
+        """Queue a row insert and wait for its committed `(id, created_at)`, also passed to `on_commit`.
+
+        A caller cancelled before the batch starts writing withdraws the insert. Once writing has
+        started the row will exist, so the cancellation waits for the commit and reports the row
+        through `on_commit` before propagating, letting the caller mark it as abandoned.
+        """
+        op = self._enqueue("insert", values)
+        try:
+            row_id, created_at = await asyncio.shield(op.future)
+        except asyncio.CancelledError:
+            if not op.claimed:
+                op.future.cancel()
+                raise
+            try:
+                row_id, created_at = await op.future
+            except Exception:
+                raise asyncio.CancelledError()
+            if on_commit is not None:
+                on_commit(row_id, created_at)
+            raise
+        if on_commit is not None:
+            on_commit(row_id, created_at)
+        return row_id, created_at
+
+    async def update(self, request_id: int, response: Optional[Dict[str, Any]], success: Optional[bool]) -> None:
+        """Queue a result update and wait until it is committed."""
+        await self._submit("update", {"_id": request_id, "response": response, "success": success})
+
+    async def upsert_latest(self, values: Dict[str, Any]) -> None:
+        """Queue a `latest_results` upsert and wait until it is committed; a newer stored result is kept."""
+        await self._submit("latest", values)
+
+    async def _submit(self, kind: str, values: Dict[str, Any]) -> Any:
+        return await self._enqueue(kind, values).future
+
+    def _enqueue(self, kind: str, values: Dict[str, Any]) -> _Op:
+        if self._runner is None:
+            raise RuntimeError("GroupCommitWriter is not started")
+        op = _Op(kind, values, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(op)
+        return op
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            op = await self._queue.get()
+            if op is None:
+                return
+            batch = [op]
+            deadline = loop.time() + self.max_delay
+            stopping = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    op = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if op is None:
+                    stopping = True
+                    break
+                batch.append(op)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[_Op]) -> None:
+        batch = [op for op in batch if not op.future.cancelled()]
+        if not batch:
+            return
+        for op in batch:
+            op.claimed = True
+        try:
+            results = await self._write(batch)
+        except Exception as e:
+            self.logger.error("Group commit failed, retrying individually", extra={"size": len(batch), "error": str(e)})
+            await self._flush_individually(batch)
+            return
+        for op, result in zip(batch, results):
+            if not op.future.done():
+                op.future.set_result(result)
+        self.logger.debug("Group commit flushed", extra={"size": len(batch)})
+
+    async def _flush_individually(self, batch: List[_Op]) -> None:
+        for op in batch:
+            try:
+                result = (await self._write([op]))[0]
+            except Exception as e:
+                if not op.future.done():
+                    op.future.set_exception(e)
+            else:
+                if not op.future.done():
+                    op.future.set_result(result)
+
+    async def _write(self, batch: List[_Op]) -> List[Any]:
+        inserts = [op for op in batch if op.kind == "insert"]
+        updates = [op for op in batch if op.kind == "update"]
+        latest: Dict[int, Dict[str, Any]] = {}
+        for op in batch:
+            if op.kind == "latest":
+                # One row per key: a multi-row upsert may not touch the same row twice.
+                current = latest.get(op.values["cadastral_key"])
+                if current is None or (current["requested_at"], current["request_id"]) <= (op.values["requested_at"], op.values["request_id"]):
+                    latest[op.values["cadastral_key"]] = op.values
+        session: AsyncSession
+        async with self.session_factory() as session:
+            async with session.begin():
+                inserted: List[Tuple[int, datetime]] = []
+                if inserts:
+                    result = await session.execute(_insert_stmt, [op.values for op in inserts])
+                    inserted = [(row.id, row.created_at) for row in result]
+                if updates:
+                    await session.execute(_update_stmt, [op.values for op in updates])
+                if latest:
+                    await session.execute(latest_results_upsert(session.bind.dialect.name, list(latest.values())))
+        by_op = {id(op): r for op, r in zip(inserts, inserted)}
+        return [by_op.get(id(op)) for op in batch]
+
+
+_writer: Optional[GroupCommitWriter] = None
+
+
+def get_group_commit_writer() -> Optional[GroupCommitWriter]:
+    """Return the process-wide writer, or `None` when group commit is disabled."""
+    return _writer
+
+
+async def start_group_commit_writer(session_factory: async_sessionmaker, max_batch: int, max_delay: float) -> GroupCommitWriter:
+    """Create and start the process-wide writer."""
+    global _writer
+    _writer = GroupCommitWriter(session_factory, max_batch=max_batch, max_delay=max_delay)
+    await _writer.start()
+    return _writer
+
+
+async def stop_group_commit_writer() -> None:
+    """Flush and stop the process-wide writer if it is running."""
+    global _writer
+    if _writer is not None:
+        await _writer.stop()
+        _writer = None
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import get_settings
+from app.core.logging import get_logger, configure_logging
+from app.query_service.cadastral import cadastral_key
+from app.query_service.models import Request, latest_results_upsert
+from app.query_service.repositories import shard_index
+from app.query_service.schemas import RequestCreate
+
+logger = get_logger("ingest")
+
+COPY_COLUMNS = ("cadastral_number", "cadastral_key", "latitude", "longitude", "payload", "response", "success", "created_at")
+
+MAX_REPORTED_ERRORS = 1000
+
+_batch_adapter = TypeAdapter(List[RequestCreate])
+
+
+@dataclass
+class IngestReport:
+    """Counters and timing of a single ingest run."""
+
+    read: int = 0
+    loaded: int = 0
+    rejected: int = 0
+    skipped: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        """Loaded rows per second of wall time."""
+        return self.loaded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """Human readable one-line throughput report."""
+        return (
+            f"read={self.read} loaded={self.loaded} rejected={self.rejected} skipped={self.skipped} "
+            f"batches={self.batches} elapsed={self.elapsed:.2f}s rate={self.rows_per_second:.0f} rows/s"
+        )
+
+
+def detect_format(path: str) -> str:
+    """Guess input format from file extension."""
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def iter_records(path: str, fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Stream `(line_no, record)` pairs; unparsable lines yield `None` records."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(f), start=1):
+                yield line_no, {k: (v if v != "" else None) for k, v in row.items()}
+            return
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_no, None
+                continue
+            yield line_no, record if isinstance(record, dict) else None
+
+
+def _parse_created_at(value: Any) -> datetime:
+    """Parse an optional `created_at` value, defaulting to now (UTC)."""
+    if isinstance(value, datetime):
+        created_at = value
+    elif value:
+        created_at = datetime.fromisoformat(str(value))
+    else:
+        return datetime.now(timezone.utc)
+    return created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+
+
+def _parse_json(value: Any) -> Optional[Dict[str, Any]]:
+    """Accept JSON objects given either inline (JSONL) or as strings (CSV); anything else is a `ValueError`."""
+    if value is None or isinstance(value, dict):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"response must be a JSON object, got {type(value).__name__}")
+    parsed = json.loads(value)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"response must be a JSON object, got {type(parsed).__name__}")
+    return parsed
+
+
+_TRUE_VALUES = ("1", "true", "t", "yes")
+_FALSE_VALUES = ("0", "false", "f", "no")
+
+
+def _parse_bool(value: Any) -> Optional[bool]:
+    """Accept booleans given either natively (JSONL) or as strings (CSV); anything else is a `ValueError`."""
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"success must be one of {', '.join(_TRUE_VALUES + _FALSE_VALUES)}, got {value!r}")
+
+
+def validate_batch(batch: List[Tuple[int, Optional[Dict[str, Any]]]]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """Validate a batch with `RequestCreate` rules in a single pass and build table rows."""
+    errors: List[Tuple[int, str]] = [(line_no, "malformed record") for line_no, record in batch if record is None]
+    candidates = [(line_no, record) for line_no, record in batch if record is not None]
+
+    try:
+        validated = _batch_adapter.validate_python([record for _, record in candidates])
+    except ValidationError as e:
+        bad: Dict[int, str] = {}
+        for err in e.errors():
+            bad.setdefault(err["loc"][0], err["msg"])
+        errors.extend((candidates[i][0], msg) for i, msg in bad.items())
+        candidates = [c for i, c in enumerate(candidates) if i not in bad]
+        validated = _batch_adapter.validate_python([record for _, record in candidates])
+
+    rows: List[Dict[str, Any]] = []
+    for (line_no, record), item in zip(candidates, validated):
+        try:
+            rows.append({
+                "cadastral_number": item.cadastral_number,
+                "cadastral_key": cadastral_key(item.cadastral_number),
+                "latitude": item.latitude,
+                "longitude": item.longitude,
+                "payload": {"cadastral_number": item.cadastral_number, "latitude": item.latitude, "longitude": item.longitude},
+                "response": _parse_json(record.get("response")),
+                "success": _parse_bool(record.get("success")),
+                "created_at": _parse_created_at(record.get("created_at")),
+            })
+        except (TypeError, ValueError) as e:
+            errors.append((line_no, str(e)))
+    return rows, errors
+
+
+async def load_rows(conn: AsyncConnection, rows: List[Dict[str, Any]]) -> None:
+    """Load rows with `COPY FROM STDIN` on PostgreSQL, multi-row executemany elsewhere."""
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        raw = await conn.get_raw_connection()
+        records = [
+            tuple(json.dumps(row[c]) if c in ("payload", "response") and row[c] is not None else row[c] for c in COPY_COLUMNS)
+            for row in rows
+        ]
+        await raw.driver_connection.copy_records_to_table(Request.__tablename__, records=records, columns=COPY_COLUMNS)
+    else:
+        await conn.execute(insert(Request.__table__), rows)
+
+
+async def refresh_latest(conn: AsyncConnection, rows: List[Dict[str, Any]]) -> None:
+    """Upsert the newest stored request of every cadastral number in `rows` into `latest_results`."""
+    keys = sorted({row["cadastral_key"] for row in rows if row["cadastral_key"] is not None})
+    if not keys:
+        return
+    rank = func.row_number().over(partition_by=Request.cadastral_key, order_by=(Request.created_at.desc(), Request.id.desc()))
+    ranked = (
+        select(
+            Request.cadastral_key,
+            Request.cadastral_number,
+            Request.id.label("request_id"),
+            Request.success,
+            Request.response,
+            Request.created_at.label("requested_at"),
+            rank.label("rank"),
+        )
+        .where(Request.cadastral_key.in_(keys), Request.created_at.is_not(None))
+        .subquery()
+    )
+    newest = select(*(c for c in ranked.c if c.name != "rank")).where(ranked.c.rank == 1)
+    await conn.execute(latest_results_upsert(conn.dialect.name, select=newest))
+
+
+def read_checkpoint(path: str) -> int:
+    """Return the last committed input line number, or 0 when no checkpoint exists."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(json.load(f).get("line", 0))
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path: str, line_no: int) -> None:
+    """Atomically persist the last committed input line number."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"line": line_no, "updated_at": datetime.now(timezone.utc).isoformat()}, f)
+    os.replace(tmp_path, path)
+
+
+async def ingest(
+        path: str,
+        db_url: Union[str, Sequence[str]],
+        *,
+        fmt: Optional[str] = None,
+        batch_size: int = 5000,
+        checkpoint_path: Optional[str] = None,
+        resume: bool = True,
+) -> IngestReport:
+    """Stream `path` into the `requests` table batch by batch, one transaction per batch.
+
+    Each batch also upserts the newest request of every loaded cadastral number into
+    `latest_results` in the same transaction, so imported history is visible to `/latest`.
+
+    With several URLs (`DB_SHARD_URLS` order) each row goes to the shard owning its cadastral
+    number and every batch is one transaction per shard. The checkpoint advances only after all
+    shards committed; a batch interrupted between shard commits is loaded again on resume.
+    """
+    fmt = fmt or detect_format(path)
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+    start_after = read_checkpoint(checkpoint_path) if resume else 0
+    report = IngestReport()
+    db_urls = [db_url] if isinstance(db_url, str) else list(db_url)
+    engines = [create_async_engine(url, future=True) for url in db_urls]
+    started = time.perf_counter()
+
+    async def flush(batch: List[Tuple[int, Optional[Dict[str, Any]]]]) -> None:
+        rows, errors = validate_batch(batch)
+        per_shard: List[List[Dict[str, Any]]] = [[] for _ in engines]
+        for row in rows:
+            per_shard[shard_index(row["cadastral_number"], len(engines)) if len(engines) > 1 else 0].append(row)
+        for engine, shard_rows in zip(engines, per_shard):
+            if shard_rows:
+                async with engine.begin() as conn:
+                    await load_rows(conn, shard_rows)
+                    await refresh_latest(conn, shard_rows)
+        write_checkpoint(checkpoint_path, batch[-1][0])
+        report.loaded += len(rows)
+        report.rejected += len(errors)
+        report.errors.extend(errors[:max(0, MAX_REPORTED_ERRORS - len(report.errors))])
+        report.batches += 1
+        report.elapsed = time.perf_counter() - started
+        logger.info("Batch loaded", extra={"line": batch[-1][0], "loaded": report.loaded, "rate": round(report.rows_per_second)})
+
+    try:
+        batch: List[Tuple[int, Optional[Dict[str, Any]]]] = []
+        for line_no, record in iter_records(path, fmt):
+            if line_no <= start_after:
+                report.skipped += 1
+                continue
+            report.read += 1
+            batch.append((line_no, record))
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        if batch:
+            await flush(batch)
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point: `python -m app.query_service.ingest FILE`."""
+    parser = argparse.ArgumentParser(description="Bulk import historical requests from JSONL/CSV.")
+    parser.add_argument("path", help="input file (.jsonl or .csv)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default=None, help="input format, detected from extension by default")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per COPY/transaction")
+    parser.add_argument("--db-url", default=None, help="async SQLAlchemy URL, defaults to the DB_SHARD_URLS shards or settings.DB_URL")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file, defaults to <path>.checkpoint")
+    parser.add_argument("--no-resume", action="store_true", help="ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    configure_logging(settings.LOG_LEVEL, settings.LOG_JSON, settings.LOG_NAME)
+    report = asyncio.run(ingest(
+        args.path,
+        args.db_url or settings.DB_SHARD_URLS or settings.DB_URL,
+        fmt=args.format,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        resume=not args.no_resume,
+    ))
+    for line_no, error in report.errors[:20]:
+        print(f"line {line_no}: {error}")
+    print(report.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,28 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, JSON, ForeignKey, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Float, JSON, ForeignKey, Index, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from app.core.db import Base
+from app.query_service.cadastral import cadastral_key
 
 
 class Request(Base):
     __tablename__ = "requests"
     __table_args__ = (
-        Index("ix_requests_cadastral_number_created_at", "cadastral_number", "created_at"),
+        Index("ix_requests_cadastral_key_created_at", "cadastral_key", "created_at"),
+        # Legacy numbers that do not parse have no key and are matched by the raw string.
+        Index(
+            "ix_requests_legacy_number_created_at",
+            "cadastral_number",
+            "created_at",
+            postgresql_where=text("cadastral_key IS NULL"),
+            sqlite_where=text("cadastral_key IS NULL"),
+        ),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
-    cadastral_number = Column(String(128), index=True, nullable=False)
+    id = Column(Integer, primary_key=True)
+    cadastral_number = Column(String(128), nullable=False)
+    cadastral_key = Column(BigInteger, nullable=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     payload = Column(JSON, nullable=True)
@@ -18,3 +30,39 @@ class Request(Base):
     success = Column(Boolean, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Not stored: set by the sharded repository to the shard the row lives on.
+    shard = None
+
+    @validates("cadastral_number")
+    def _sync_cadastral_key(self, _, value: str) -> str:
+        self.cadastral_key = cadastral_key(value)
+        return value
+
+
+class LatestResult(Base):
+    """Last known result per cadastral number, maintained by upsert."""
+
+    __tablename__ = "latest_results"
+
+    cadastral_key = Column(BigInteger, primary_key=True, autoincrement=False)
+    cadastral_number = Column(String(128), nullable=False)
+    request_id = Column(Integer, nullable=False)
+    success = Column(Boolean, nullable=True)
+    response = Column(JSON, nullable=True)
+    requested_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Not stored: set by the sharded repository to the shard the row lives on.
+    shard = None
+
+
+def latest_results_upsert(dialect_name: str, rows=None, select=None):
+    """`INSERT ... ON CONFLICT DO UPDATE` of `rows` (or `select`) into `latest_results` that never replaces a newer result."""
+    dialect = postgresql if dialect_name == "postgresql" else sqlite
+    table = LatestResult.__table__
+    stmt = dialect.insert(table)
+    stmt = stmt.from_select([c.name for c in table.columns], select) if select is not None else stmt.values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.cadastral_key],
+        set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != "cadastral_key"},
+        where=table.c.requested_at <= stmt.excluded.requested_at,
+    )
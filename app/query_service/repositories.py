@@ -1,10 +1,18 @@
+import asyncio
+import hashlib
+import heapq
+from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
-from app.query_service.models import Request
+from itertools import islice
+from typing import List, Optional, Dict, Any, Sequence
+from app.query_service.models import Request, LatestResult, latest_results_upsert
+from app.query_service.cadastral import cadastral_key
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
 from app.core.logging import get_logger
+from app.query_service.group_commit import GroupCommitWriter
 
 
 class AbstractRequestRepository(ABC):
@@ -77,7 +85,13 @@ class SQLAlchemyRequestRepository(AbstractRequestRepository):
         return items
 
     async def get_by_cadastral_number(self, cadastral_number: str, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Request]:
-        query = select(Request).where(Request.cadastral_number == cadastral_number).order_by(Request.created_at.desc())
+        key = cadastral_key(cadastral_number)
+        if key is not None:
+            condition = Request.cadastral_key == key
+        else:
+            # Matches the partial index on legacy rows, which never have a key.
+            condition = and_(Request.cadastral_key.is_(None), Request.cadastral_number == cadastral_number)
+        query = select(Request).where(condition).order_by(Request.created_at.desc())
         if limit is not None:
             query = query.limit(limit)
         if offset is not None:
@@ -86,3 +100,189 @@ class SQLAlchemyRequestRepository(AbstractRequestRepository):
         items = result.scalars().all()
         self.logger.debug("Fetched by cadastral", extra={"cadastral_number": cadastral_number, "limit": limit, "offset": offset, "count": len(items)})
         return items
+
+
+class GroupCommitRequestRepository(SQLAlchemyRequestRepository):
+    """Repository that routes writes through a shared `GroupCommitWriter` and reads via the session."""
+
+    def __init__(self, session: AsyncSession, writer: GroupCommitWriter):
+        """Initialize repository with a session for reads and a writer for inserts/updates."""
+        super().__init__(session)
+        self.writer = writer
+
+    async def create(self, request: Request) -> Request:
+        values = {
+            column.name: getattr(request, column.name)
+            for column in Request.__table__.columns
+            if column.name not in ("id", "created_at")
+        }
+
+        def _assign(row_id: int, created_at: datetime) -> None:
+            # Also runs when the caller is cancelled after the row was written, so it can be marked.
+            request.id, request.created_at = row_id, created_at
+
+        await self.writer.insert(values, on_commit=_assign)
+        self.logger.info("Request created", extra={"request_id": request.id})
+        return request
+
+    async def update_request_result(self, *, request: Request, response: Optional[Dict[str, Any]], success: Optional[bool]) -> Request:
+        await self.writer.update(request.id, response, success)
+        request.response = response
+        request.success = success
+        self.logger.debug("Request updated", extra={"request_id": request.id, "success": success})
+        return request
+
+
+class AbstractLatestResultRepository(ABC):
+    """An abstract repository for the last known result per cadastral number."""
+
+    @abstractmethod
+    async def upsert(self, request: Request) -> None:
+        """Store `request` as the latest result unless a newer one is already stored."""
+        pass
+
+    @abstractmethod
+    async def get_many(self, cadastral_keys: List[int]) -> List[LatestResult]:
+        """Returns latest results for the given packed cadastral keys in one query."""
+        pass
+
+
+def latest_values(request: Request) -> Dict[str, Any]:
+    """Column values of the `latest_results` row for a finished `request`."""
+    return {
+        "cadastral_key": request.cadastral_key,
+        "cadastral_number": request.cadastral_number,
+        "request_id": request.id,
+        "success": request.success,
+        "response": request.response,
+        "requested_at": request.created_at,
+    }
+
+
+class SQLAlchemyLatestResultRepository(AbstractLatestResultRepository):
+    """Latest-result repository using dialect-specific `INSERT ... ON CONFLICT DO UPDATE`."""
+
+    def __init__(self, session: AsyncSession):
+        """Initialize repository with an active async session."""
+        self.session: AsyncSession = session
+        self.logger = get_logger("repo")
+
+    async def upsert(self, request: Request) -> None:
+        stmt = latest_results_upsert(self.session.bind.dialect.name, [latest_values(request)])
+        try:
+            await self.session.execute(stmt)
+            await self.session.commit()
+            self.logger.debug("Latest result upserted", extra={"request_id": request.id})
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            self.logger.error("Latest upsert failed", extra={"request_id": request.id, "error": str(e)})
+            raise e
+
+    async def get_many(self, cadastral_keys: List[int]) -> List[LatestResult]:
+        if not cadastral_keys:
+            return []
+        result = await self.session.execute(select(LatestResult).where(LatestResult.cadastral_key.in_(cadastral_keys)))
+        items = result.scalars().all()
+        self.logger.debug("Fetched latest results", extra={"requested": len(cadastral_keys), "count": len(items)})
+        return items
+
+
+class GroupCommitLatestResultRepository(SQLAlchemyLatestResultRepository):
+    """Latest-result repository that upserts through a shared `GroupCommitWriter` and reads via the session."""
+
+    def __init__(self, session: AsyncSession, writer: GroupCommitWriter):
+        """Initialize repository with a session for reads and a writer for upserts."""
+        super().__init__(session)
+        self.writer = writer
+
+    async def upsert(self, request: Request) -> None:
+        await self.writer.upsert_latest(latest_values(request))
+        self.logger.debug("Latest result upserted", extra={"request_id": request.id})
+
+
+def _hash_to_shard(token: bytes, shard_count: int) -> int:
+    return int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), "big") % shard_count
+
+
+def shard_index_for_key(key: int, shard_count: int) -> int:
+    """Stable shard for a packed cadastral key."""
+    return _hash_to_shard(key.to_bytes(8, "big"), shard_count)
+
+
+def shard_index(cadastral_number: str, shard_count: int) -> int:
+    """Stable shard for a cadastral number: every spelling of one number maps to the same shard."""
+    key = cadastral_key(cadastral_number)
+    if key is not None:
+        return shard_index_for_key(key, shard_count)
+    return _hash_to_shard(cadastral_number.encode("utf-8"), shard_count)
+
+
+def _tag_shard(rows: List[Any], index: int) -> List[Any]:
+    for row in rows:
+        row.shard = index
+    return rows
+
+
+class ShardedRequestRepository(AbstractRequestRepository):
+    """Routes per-number operations to one shard and scatter-gathers global history.
+
+    Request ids are unique per shard only; returned rows carry `shard`, so the `(shard, id)`
+    pair identifies a row globally.
+    """
+
+    def __init__(self, shards: Sequence[AbstractRequestRepository]):
+        """Initialize with one repository per shard, in `DB_SHARD_URLS` order."""
+        if not shards:
+            raise ValueError("at least one shard is required")
+        self.shards = list(shards)
+        self.logger = get_logger("repo")
+
+    def shard_for(self, cadastral_number: str) -> AbstractRequestRepository:
+        return self.shards[shard_index(cadastral_number, len(self.shards))]
+
+    async def create(self, request: Request) -> Request:
+        request = await self.shard_for(request.cadastral_number).create(request)
+        request.shard = shard_index(request.cadastral_number, len(self.shards))
+        return request
+
+    async def update_request_result(self, *, request: Request, response: Optional[Dict[str, Any]], success: Optional[bool]) -> Request:
+        request = await self.shard_for(request.cadastral_number).update_request_result(request=request, response=response, success=success)
+        request.shard = shard_index(request.cadastral_number, len(self.shards))
+        return request
+
+    async def get_by_cadastral_number(self, cadastral_number: str, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Request]:
+        index = shard_index(cadastral_number, len(self.shards))
+        return _tag_shard(await self.shards[index].get_by_cadastral_number(cadastral_number, limit=limit, offset=offset), index)
+
+    async def get_all(self, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Request]:
+        """K-way merge of each shard's newest `offset + limit` rows by `created_at` desc."""
+        offset = offset or 0
+        per_shard = offset + limit if limit is not None else None
+        results = await asyncio.gather(*(shard.get_all(limit=per_shard, offset=None) for shard in self.shards))
+        results = [_tag_shard(rows, index) for index, rows in enumerate(results)]
+        merged = heapq.merge(*results, key=lambda r: r.created_at, reverse=True)
+        stop = offset + limit if limit is not None else None
+        items = list(islice(merged, offset, stop))
+        self.logger.debug("Fetched all requests from shards", extra={"shards": len(self.shards), "limit": limit, "offset": offset, "count": len(items)})
+        return items
+
+
+class ShardedLatestResultRepository(AbstractLatestResultRepository):
+    """Keeps each number's latest result on the same shard as its requests."""
+
+    def __init__(self, shards: Sequence[AbstractLatestResultRepository]):
+        """Initialize with one repository per shard, in `DB_SHARD_URLS` order."""
+        if not shards:
+            raise ValueError("at least one shard is required")
+        self.shards = list(shards)
+
+    async def upsert(self, request: Request) -> None:
+        await self.shards[shard_index(request.cadastral_number, len(self.shards))].upsert(request)
+
+    async def get_many(self, cadastral_keys: List[int]) -> List[LatestResult]:
+        """One indexed query per shard that owns at least one of the keys."""
+        by_shard: Dict[int, List[int]] = {}
+        for key in cadastral_keys:
+            by_shard.setdefault(shard_index_for_key(key, len(self.shards)), []).append(key)
+        results = await asyncio.gather(*(self.shards[i].get_many(keys) for i, keys in by_shard.items()))
+        return [row for index, rows in zip(by_shard, results) for row in _tag_shard(rows, index)]
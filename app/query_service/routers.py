@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, Query, status
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from typing import List, Dict
-from app.query_service.schemas import RequestCreate, RequestRead
-from app.query_service.dependencies import get_request_service
+from app.query_service.schemas import RequestCreate, RequestRead, LatestQuery, LatestRead
+from app.query_service.cadastral import normalize_cadastral_number
+from app.query_service.dependencies import get_request_service, get_latest_service, get_deadline, get_client_context
+from app.query_service.deadlines import Deadline
+from app.query_service.scheduler import ClientContext
 from app.core.logging import get_logger
+from app.core.profiling import ProfiledRoute
 from app.query_service.services import RequestService
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 logger = get_logger("api")
 
 
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """Block until the ASGI server reports that the client went away."""
+    while True:
+        message = await http_request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
 @router.get("/ping", summary="Health check", description="Returns simple ok status.")
 async def ping() -> Dict[str, str]:
     """Health check endpoint."""
@@ -26,15 +39,35 @@ async def ping() -> Dict[str, str]:
 )
 async def query_endpoint(
         request: RequestCreate,
+        http_request: Request,
+        deadline: Deadline = Depends(get_deadline),
+        client: ClientContext = Depends(get_client_context),
         service: RequestService = Depends(get_request_service)
 ) -> RequestRead:
-    """Create a `Request` and delegate processing to the service layer."""
-    logger.info("Incoming query", extra={"cadastral_number": request.cadastral_number})
-    result = await service.process_request(
+    """Create a `Request` and delegate processing to the service layer, cancelling it if the client disconnects."""
+    logger.info("Incoming query", extra={"cadastral_number": request.cadastral_number, "timeout": deadline.timeout, "client_id": client.client_id, "priority": client.priority})
+    processing = asyncio.create_task(service.process_request(
         cadastral_number=request.cadastral_number,
         latitude=request.latitude,
-        longitude=request.longitude
-    )
+        longitude=request.longitude,
+        deadline=deadline,
+        client=client,
+    ))
+    disconnect = asyncio.create_task(_wait_for_disconnect(http_request))
+    try:
+        await asyncio.wait({processing, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect.cancel()
+        if not processing.done():
+            processing.cancel()
+            try:
+                await processing
+            except asyncio.CancelledError:
+                pass
+    if processing.cancelled():
+        logger.info("Client disconnected, query cancelled", extra={"cadastral_number": request.cadastral_number})
+        raise HTTPException(status_code=499, detail={"message": "Client closed request"})
+    result = processing.result()
     logger.info("Query processed", extra={"request_id": result.id, "success": result.success})
     return result
 
@@ -76,3 +109,40 @@ async def history_by_cadastral(
     items = await service.get_history_by_cadastral_number(cadastral_number, limit=limit, offset=offset)
     logger.info("History by cadastral returned", extra={"cadastral_number": cadastral_number, "count": len(items)})
     return items
+
+
+@router.get(
+    "/latest/{cadastral_number}",
+    response_model=LatestRead,
+    summary="Latest result for a cadastral number",
+    description="Returns the last known result from the latest-results table (served from an in-process hot set when possible).",
+)
+async def latest_by_cadastral(
+        cadastral_number: str,
+        service: RequestService = Depends(get_latest_service)
+) -> LatestRead:
+    """Return the current status of one cadastral number."""
+    try:
+        cadastral_number = normalize_cadastral_number(cadastral_number)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail={"message": str(e)})
+    item = await service.get_latest(cadastral_number)
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail={"message": "No result for cadastral number", "cadastral_number": cadastral_number})
+    return item
+
+
+@router.post(
+    "/latest",
+    response_model=List[LatestRead],
+    summary="Latest results for many cadastral numbers",
+    description="Returns last known results for up to 1000 numbers in one indexed query; unknown numbers are omitted.",
+)
+async def latest_bulk(
+        query: LatestQuery,
+        service: RequestService = Depends(get_latest_service)
+) -> List[LatestRead]:
+    """Return the current status of many cadastral numbers."""
+    items = await service.get_latest_many(query.cadastral_numbers)
+    logger.info("Latest bulk returned", extra={"requested": len(query.cadastral_numbers), "count": len(items)})
+    return items
@@ -0,0 +1,251 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from app.core.config import get_settings
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+@dataclass
+class ClientContext:
+    """Who is calling and how urgent the call is."""
+
+    client_id: str = "anonymous"
+    priority: str = INTERACTIVE
+
+
+@dataclass
+class _Waiter:
+    client_id: str
+    priority: str
+    future: asyncio.Future
+    enqueued_at: float
+
+
+@dataclass
+class ClientStats:
+    """Per-client queue depth and wait time counters."""
+
+    queued: Dict[str, int] = field(default_factory=lambda: {p: 0 for p in PRIORITIES})
+    in_flight: int = 0
+    granted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": dict(self.queued),
+            "in_flight": self.in_flight,
+            "granted": self.granted,
+            "avg_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+class _Lane:
+    """Deficit round robin over per-client FIFO queues."""
+
+    def __init__(self, weights: Dict[str, float], quantum: float):
+        self.weights = weights
+        self.quantum = quantum
+        self.queues: Dict[str, Deque[_Waiter]] = {}
+        self.active: Deque[str] = deque()
+        self.deficit: Dict[str, float] = {}
+        self._turn: Optional[str] = None
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self.queues.values())
+
+    def push(self, waiter: _Waiter) -> None:
+        queue = self.queues.setdefault(waiter.client_id, deque())
+        if not queue:
+            self.active.append(waiter.client_id)
+            self.deficit[waiter.client_id] = 0.0
+        queue.append(waiter)
+
+    def remove(self, waiter: _Waiter) -> bool:
+        queue = self.queues.get(waiter.client_id)
+        if not queue or waiter not in queue:
+            return False
+        queue.remove(waiter)
+        if not queue:
+            self._retire(waiter.client_id)
+        return True
+
+    def pop(self) -> Optional[_Waiter]:
+        """Next waiter: a client starting its turn earns `quantum * weight` credit and spends 1 per call."""
+        while self.active:
+            client_id = self.active[0]
+            if self._turn != client_id:
+                self._turn = client_id
+                self.deficit[client_id] += self.quantum * self.weights.get(client_id, 1.0)
+            if self.deficit[client_id] >= 1.0:
+                self.deficit[client_id] -= 1.0
+                waiter = self.queues[client_id].popleft()
+                if not self.queues[client_id]:
+                    self._retire(client_id)
+                return waiter
+            self.active.rotate(-1)
+            self._turn = None
+        return None
+
+    def _retire(self, client_id: str) -> None:
+        self.active.remove(client_id)
+        self.deficit.pop(client_id, None)
+        self.queues.pop(client_id, None)
+        if self._turn == client_id:
+            self._turn = None
+
+
+class FairScheduler:
+    """Caps concurrent outbound calls and hands out free slots fairly.
+
+    Clients share slots by weighted deficit round robin. Interactive callers are served
+    before bulk ones, but while bulk work waits it still gets about `bulk_share` of the
+    grants, so it is never starved. Hedged duplicates take their own slot through
+    `try_acquire` and are skipped when none is free, so `max_concurrency` also bounds hedges. Stats of idle clients are kept for at most `max_clients`
+    clients, least recently active first out, so client ids from headers cannot grow it unbounded.
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            weights: Optional[Dict[str, float]] = None,
+            bulk_share: float = 0.1,
+            quantum: float = 1.0,
+            max_clients: int = 10000,
+    ):
+        if any(weight <= 0 for weight in (weights or {}).values()):
+            raise ValueError("client weights must be positive")
+        self.max_concurrency = max_concurrency
+        self.bulk_share = bulk_share
+        self.lanes = {p: _Lane(weights or {}, quantum) for p in PRIORITIES}
+        self.in_flight = 0
+        self.max_clients = max_clients
+        self.clients: "OrderedDict[str, ClientStats]" = OrderedDict()
+        self._bulk_every = math.ceil((1 - bulk_share) / bulk_share) if bulk_share > 0 else None
+        self._bulk_passed = 0
+
+    @property
+    def queued(self) -> int:
+        """Total number of callers waiting for a slot."""
+        return sum(len(lane) for lane in self.lanes.values())
+
+    async def acquire(self, client: ClientContext) -> None:
+        """Wait until a slot is granted to `client`."""
+        priority = client.priority if client.priority in PRIORITIES else INTERACTIVE
+        stats = self.clients.setdefault(client.client_id, ClientStats())
+        waiter = _Waiter(client.client_id, priority, asyncio.get_running_loop().create_future(), time.monotonic())
+        self.lanes[priority].push(waiter)
+        stats.queued[priority] += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if self.lanes[priority].remove(waiter):
+                stats.queued[priority] -= 1
+                self._settle(client.client_id)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self.release(client)
+            raise
+
+    def try_acquire(self, client: ClientContext) -> bool:
+        """Take a slot for `client` only if one is free and nobody is queued; never waits."""
+        if self.in_flight >= self.max_concurrency or self.queued:
+            return False
+        stats = self.clients.setdefault(client.client_id, ClientStats())
+        self.in_flight += 1
+        stats.in_flight += 1
+        stats.granted += 1
+        return True
+
+    def release(self, client: ClientContext) -> None:
+        """Return a slot taken by `client` and wake the next waiter."""
+        self.in_flight -= 1
+        self.clients[client.client_id].in_flight -= 1
+        self._settle(client.client_id)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, client: ClientContext) -> AsyncIterator[None]:
+        await self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release(client)
+
+    def _settle(self, client_id: str) -> None:
+        """Mark an idle client as most recently active and evict the oldest idle clients over the cap."""
+        stats = self.clients[client_id]
+        if stats.in_flight or any(stats.queued.values()):
+            return
+        self.clients.move_to_end(client_id)
+        if len(self.clients) <= self.max_clients:
+            return
+        for other_id in list(self.clients):
+            other = self.clients[other_id]
+            if not other.in_flight and not any(other.queued.values()):
+                del self.clients[other_id]
+                if len(self.clients) <= self.max_clients:
+                    return
+
+    def _next_lane(self) -> Optional[_Lane]:
+        interactive, bulk = self.lanes[INTERACTIVE], self.lanes[BULK]
+        if not len(bulk):
+            return interactive if len(interactive) else None
+        if not len(interactive) or (self._bulk_every is not None and self._bulk_passed >= self._bulk_every):
+            self._bulk_passed = 0
+            return bulk
+        self._bulk_passed += 1
+        return interactive
+
+    def _dispatch(self) -> None:
+        while self.in_flight < self.max_concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter = lane.pop()
+            stats = self.clients[waiter.client_id]
+            stats.queued[waiter.priority] -= 1
+            if waiter.future.done():
+                continue
+            wait = time.monotonic() - waiter.enqueued_at
+            self.in_flight += 1
+            stats.in_flight += 1
+            stats.granted += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            waiter.future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "clients": {client_id: s.as_dict() for client_id, s in self.clients.items()},
+        }
+
+
+_scheduler: Optional[FairScheduler] = None
+
+
+def get_scheduler() -> Optional[FairScheduler]:
+    """Return the process-wide scheduler, or `None` when outbound calls are not limited."""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        if settings.EXTERNAL_MAX_CONCURRENCY > 0:
+            _scheduler = FairScheduler(
+                settings.EXTERNAL_MAX_CONCURRENCY,
+                weights=settings.SCHEDULER_CLIENT_WEIGHTS,
+                bulk_share=settings.SCHEDULER_BULK_SHARE,
+                max_clients=settings.SCHEDULER_MAX_CLIENTS,
+            )
+    return _scheduler
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict, field_validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
+from app.query_service.cadastral import normalize_cadastral_number
 
 
 class RequestCreate(BaseModel):
@@ -10,6 +11,11 @@ class RequestCreate(BaseModel):
     latitude: float
     longitude: float
 
+    @field_validator("cadastral_number")
+    @classmethod
+    def validate_cadastral_number(cls, v: str) -> str:
+        return normalize_cadastral_number(v)
+
     @field_validator("latitude")
     @classmethod
     def validate_latitude(cls, v: float) -> float:
@@ -36,5 +42,30 @@ class RequestRead(BaseModel):
     response: Optional[dict] = None
     success: Optional[bool] = None
     created_at: datetime
+    shard: Optional[int] = Field(default=None, description="Shard holding the row when sharding is on; `id` is unique per shard")
 
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+
+class LatestQuery(BaseModel):
+    """Bulk lookup of latest results for many cadastral numbers."""
+
+    cadastral_numbers: List[str] = Field(min_length=1, max_length=1000)
+
+    @field_validator("cadastral_numbers")
+    @classmethod
+    def validate_cadastral_numbers(cls, v: List[str]) -> List[str]:
+        return [normalize_cadastral_number(n) for n in v]
+
+
+class LatestRead(BaseModel):
+    """Last known result for a cadastral number."""
+
+    cadastral_number: str
+    request_id: int
+    success: Optional[bool] = None
+    response: Optional[dict] = None
+    requested_at: datetime
+    shard: Optional[int] = Field(default=None, description="Shard holding the request when sharding is on; `request_id` is unique per shard")
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,47 +1,163 @@
-from typing import List, Optional
+import asyncio
+from typing import Any, Dict, List, Optional
 from app.query_service.models import Request
-from app.query_service.repositories import AbstractRequestRepository
+from app.query_service.repositories import AbstractRequestRepository, AbstractLatestResultRepository
+from app.query_service.cache import LRUCache
+from app.query_service.schemas import LatestRead
 from app.query_service.utils import send_to_external_service, ExternalServiceError
+from app.query_service.deadlines import Deadline
+from app.query_service.scheduler import ClientContext, FairScheduler
+from app.query_service.cadastral import normalize_cadastral_number, parse_cadastral_number
 from fastapi import HTTPException
 from app.core.logging import get_logger
+from app.core.profiling import stage
 
 
 class RequestService:
     """Orchestrates request processing and history retrieval."""
 
-    def __init__(self, repository: AbstractRequestRepository):
+    def __init__(
+            self,
+            repository: AbstractRequestRepository,
+            latest_repository: Optional[AbstractLatestResultRepository] = None,
+            latest_cache: Optional[LRUCache] = None,
+            scheduler: Optional[FairScheduler] = None,
+    ):
         self.repository: AbstractRequestRepository = repository
+        self.latest_repository: Optional[AbstractLatestResultRepository] = latest_repository
+        self.latest_cache: LRUCache = latest_cache if latest_cache is not None else LRUCache(capacity=0)
+        self.scheduler: Optional[FairScheduler] = scheduler
         self.logger = get_logger("service")
 
-    async def process_request(self, cadastral_number: str, latitude: Optional[float] = None, longitude: Optional[float] = None) -> Request:
-        """Create a `Request`, call external service, persist result, and return entity."""
+    async def process_request(
+            self,
+            cadastral_number: str,
+            latitude: Optional[float] = None,
+            longitude: Optional[float] = None,
+            deadline: Optional[Deadline] = None,
+            client: Optional[ClientContext] = None,
+    ) -> Request:
+        """Create a `Request`, call external service, persist result, and return entity.
+
+        When `deadline` passes the row is marked expired and HTTP 504 is raised; when the
+        caller is cancelled (client disconnect) the row is marked cancelled before re-raising.
+        Time spent waiting for an outbound slot of `client` counts against the deadline.
+        """
         payload = {"cadastral_number": cadastral_number, "latitude": latitude, "longitude": longitude}
 
         request = Request(cadastral_number=cadastral_number, latitude=latitude, longitude=longitude, payload=payload)
-        request = await self.repository.create(request)
 
         try:
-            success = await send_to_external_service(payload)
-            request = await self.repository.update_request_result(request=request, response={"success": success}, success=success)
-            self.logger.info("Processed request successfully", extra={"request_id": request.id, "success": success})
-            return request
-
+            async with asyncio.timeout(deadline.remaining() if deadline is not None else None):
+                with stage("repository_create"):
+                    request = await self.repository.create(request)
+                success = await self._call_external(payload, client or ClientContext())
+        except TimeoutError:
+            if request.id is not None:
+                await self._mark_aborted(request, "deadline_exceeded")
+            self.logger.error("Request deadline exceeded", extra={"request_id": request.id})
+            raise HTTPException(status_code=504, detail={"message": "Request deadline exceeded", "request_id": request.id})
+        except asyncio.CancelledError:
+            if request.id is not None:
+                await asyncio.shield(self._mark_aborted(request, "cancelled"))
+            self.logger.info("Request cancelled", extra={"request_id": request.id})
+            raise
         except ExternalServiceError as e:
-            request = await self.repository.update_request_result(request=request, response={"success": None, "error": str(e)}, success=None)
+            with stage("repository_update"):
+                request = await self.repository.update_request_result(request=request, response={"success": None, "error": str(e)}, success=None)
+            await self._remember_latest(request)
             error_text = str(e)
             self.logger.error("Processing failed", extra={"request_id": request.id, "error": error_text})
 
             if error_text == "timeout":
                 raise HTTPException(status_code=504, detail={"message": "External service timeout (more than 60 sec)", "request_id": request.id})
+            elif error_text == "pool_timeout":
+                raise HTTPException(status_code=503, detail={"message": "External service connection pool exhausted", "request_id": request.id})
             elif error_text.startswith("http_error") or error_text == "invalid_response":
                 raise HTTPException(status_code=502, detail={"message": f"External service error: {error_text}", "request_id": request.id})
             else:
                 raise HTTPException(status_code=500, detail={"message": f"External service error: {error_text}", "request_id": request.id})
 
+        with stage("repository_update"):
+            request = await self.repository.update_request_result(request=request, response={"success": success}, success=success)
+        await self._remember_latest(request)
+        self.logger.info("Processed request successfully", extra={"request_id": request.id, "success": success})
+        return request
+
+    async def _call_external(self, payload: Dict[str, Any], client: ClientContext) -> bool:
+        """Call the external service, first waiting for a fair-share slot when a scheduler is set; a hedge needs a free slot too."""
+        if self.scheduler is None:
+            with stage("external_call"):
+                return await send_to_external_service(payload)
+        with stage("external_queue"):
+            await self.scheduler.acquire(client)
+        try:
+            with stage("external_call"):
+                return await send_to_external_service(
+                    payload,
+                    try_acquire_hedge_slot=lambda: self.scheduler.try_acquire(client),
+                    release_hedge_slot=lambda: self.scheduler.release(client),
+                )
+        finally:
+            self.scheduler.release(client)
+
+    async def _mark_aborted(self, request: Request, reason: str) -> None:
+        """Best-effort marking of a request abandoned before the external service answered."""
+        try:
+            await self.repository.update_request_result(request=request, response={"success": None, "error": reason}, success=None)
+        except Exception as e:
+            self.logger.error("Failed to mark aborted request", extra={"request_id": request.id, "reason": reason, "error": str(e)})
+
+    async def _remember_latest(self, request: Request) -> None:
+        """Best-effort write-through of a finished request to the latest-results table and hot set."""
+        if self.latest_repository is None or request.cadastral_key is None or request.created_at is None:
+            return
+        try:
+            with stage("latest_upsert"):
+                await self.latest_repository.upsert(request)
+        except Exception as e:
+            self.logger.error("Failed to store latest result", extra={"request_id": request.id, "error": str(e)})
+            return
+        cached = self.latest_cache.get(request.cadastral_key)
+        if cached is None or cached.requested_at <= request.created_at:
+            self.latest_cache.set(request.cadastral_key, LatestRead.model_validate({
+                "cadastral_number": request.cadastral_number,
+                "request_id": request.id,
+                "success": request.success,
+                "response": request.response,
+                "requested_at": request.created_at,
+                "shard": request.shard,
+            }))
+
+    async def get_latest_many(self, cadastral_numbers: List[str]) -> List[LatestRead]:
+        """Return latest results for canonical `cadastral_numbers`: hot set first, one indexed query for the misses."""
+        keys = list(dict.fromkeys(parse_cadastral_number(n).key for n in cadastral_numbers))
+        found: Dict[int, LatestRead] = self.latest_cache.get_many(keys)
+        missing = [k for k in keys if k not in found]
+        if missing and self.latest_repository is not None:
+            with stage("repository_read"):
+                rows = await self.latest_repository.get_many(missing)
+            for row in rows:
+                item = LatestRead.model_validate(row)
+                self.latest_cache.set(row.cadastral_key, item)
+                found[row.cadastral_key] = item
+        return [found[k] for k in keys if k in found]
+
+    async def get_latest(self, cadastral_number: str) -> Optional[LatestRead]:
+        """Return the latest result for one canonical cadastral number, or `None`."""
+        items = await self.get_latest_many([cadastral_number])
+        return items[0] if items else None
+
     async def get_history_all(self, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Request]:
         """Return all requests with pagination."""
-        return await self.repository.get_all(limit=limit, offset=offset)
+        with stage("repository_read"):
+            return await self.repository.get_all(limit=limit, offset=offset)
 
     async def get_history_by_cadastral_number(self, cadastral_number: str, limit: Optional[int] = None, offset: Optional[int] = None) -> List[Request]:
         """Return requests filtered by cadastral number with pagination."""
-        return await self.repository.get_by_cadastral_number(cadastral_number, limit=limit, offset=offset)
+        try:
+            cadastral_number = normalize_cadastral_number(cadastral_number)
+        except ValueError:
+            pass
+        with stage("repository_read"):
+            return await self.repository.get_by_cadastral_number(cadastral_number, limit=limit, offset=offset)
@@ -1,6 +1,11 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Awaitable, Callable, Deque, Dict, Any, Optional
+
 import httpx
-from typing import Dict, Any
-from app.core.config import settings
+from app.core.config import get_settings
 from app.core.logging import get_logger
 
 
@@ -12,15 +17,215 @@ class ExternalServiceError(Exception):
 logger = get_logger("external")
 
 
-async def send_to_external_service(payload: Dict[str, Any], timeout: int = 60) -> bool:
-    """Send JSON payload to external service and return success flag."""
-    external_url = settings.EXTERNAL_SERVICE_URL
+class LatencyTracker:
+    """Sliding window of recently observed external call latencies."""
+
+    def __init__(self, window: int = 500, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float) -> None:
+        """Record a completed call latency."""
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Return the `p`-th percentile latency, or `None` until enough samples are collected."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class HedgeBudget:
+    """Token bucket limiting hedged calls to `ratio` of all calls; starts with `initial` tokens (at most `burst`)."""
+
+    def __init__(self, ratio: float, burst: float = 10.0, initial: float = 0.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = min(burst, initial)
+
+    def on_call(self) -> None:
+        """Earn budget for a primary call."""
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend budget for one hedge if available."""
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+@dataclass
+class HedgeStats:
+    """Counters describing hedging behaviour."""
+
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    primary_wins: int = 0
+    budget_exhausted: int = 0
+    no_slot: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class RequestHedger:
+    """Fires a second identical call when the first is slower than a recent latency percentile."""
+
+    def __init__(
+            self,
+            percentile: float = 95.0,
+            budget_ratio: float = 0.05,
+            min_delay: float = 0.05,
+            tracker: Optional[LatencyTracker] = None,
+            initial_budget: float = 0.0,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.tracker = tracker or LatencyTracker()
+        self.budget = HedgeBudget(budget_ratio, initial=initial_budget)
+        self.stats = HedgeStats()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay after which a hedge is fired, `None` while latency history is too short."""
+        observed = self.tracker.percentile(self.percentile)
+        if observed is None:
+            return None
+        return max(self.min_delay, observed)
+
+    async def _timed(self, factory: Callable[[], Awaitable[Any]], observe_cancelled: bool = False) -> Any:
+        """Await `factory()` and record its latency, failed calls (timeouts are the tail) included.
+
+        With `observe_cancelled` a cancelled call's elapsed time is recorded as a lower bound.
+        """
+        started = time.perf_counter()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            if observe_cancelled:
+                self.tracker.observe(time.perf_counter() - started)
+            raise
+        except Exception:
+            self.tracker.observe(time.perf_counter() - started)
+            raise
+        self.tracker.observe(time.perf_counter() - started)
+        return result
+
+    async def call(
+            self,
+            factory: Callable[[], Awaitable[Any]],
+            try_acquire_slot: Optional[Callable[[], bool]] = None,
+            release_slot: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Run `factory()`, hedging it once if it is slow; the first successful answer wins.
+
+        With `try_acquire_slot` the hedge is fired only if it grants a concurrency slot, which
+        `release_slot` returns once the hedge finishes.
+        """
+        self.stats.calls += 1
+        self.budget.on_call()
+        # A primary cancelled after a hedge wins was slow: keep its elapsed time as a sample so the
+        # percentile does not drift low; a cancelled hedge says nothing about the tail.
+        primary = asyncio.create_task(self._timed(factory, observe_cancelled=True))
+        tasks = {primary}
+        try:
+            delay = self.hedge_delay()
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            if try_acquire_slot is not None and not try_acquire_slot():
+                self.stats.no_slot += 1
+                return await primary
+            if not self.budget.try_acquire():
+                self.stats.budget_exhausted += 1
+                if release_slot is not None:
+                    release_slot()
+                return await primary
+
+            hedge = asyncio.create_task(self._timed(factory))
+            if release_slot is not None:
+                hedge.add_done_callback(lambda _: release_slot())
+            tasks.add(hedge)
+            self.stats.hedges += 1
+            logger.debug("External request hedged", extra={"delay": delay})
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats.hedge_wins += 1
+                        else:
+                            self.stats.primary_wins += 1
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+_hedger: Optional[RequestHedger] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+async def start_http_client(timeout: int = 60, max_connections: Optional[int] = None, pool_timeout: float = 5.0) -> httpx.AsyncClient:
+    """Create the shared pooled client used for external calls.
+
+    httpx caps a client at 100 connections by default; here the pool is unbounded unless
+    `max_connections` is given, and waiting for a pooled connection has its own short timeout.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, pool=pool_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=100),
+        )
+    return _http_client
+
+
+async def stop_http_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_hedger() -> Optional[RequestHedger]:
+    """Return the process-wide hedger, or `None` when hedging is disabled."""
+    global _hedger
+    settings = get_settings()
+    if _hedger is None and settings.EXTERNAL_HEDGE_ENABLED:
+        _hedger = RequestHedger(
+            percentile=settings.EXTERNAL_HEDGE_PERCENTILE,
+            budget_ratio=settings.EXTERNAL_HEDGE_BUDGET,
+            min_delay=settings.EXTERNAL_HEDGE_MIN_DELAY_MS / 1000,
+            tracker=LatencyTracker(min_samples=settings.EXTERNAL_HEDGE_MIN_SAMPLES),
+        )
+    return _hedger
+
+
+async def post_to_external_service(url: str, payload: Dict[str, Any], timeout: int = 60, client: Optional[httpx.AsyncClient] = None) -> bool:
+    """Send one JSON request to `url` and return the success flag, reusing `client` when given."""
     try:
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(external_url, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            logger.info("External request succeeded", extra={"payload": payload, "status_code": response.status_code})
+        if client is None:
+            async with httpx.AsyncClient(timeout=timeout) as own_client:
+                response = await own_client.post(url, json=payload)
+        else:
+            response = await client.post(url, json=payload)
+        response.raise_for_status()
+        data = response.json()
+        logger.info("External request succeeded", extra={"payload": payload, "status_code": response.status_code})
+    except httpx.PoolTimeout:
+        logger.error("External connection pool exhausted", extra={"payload": payload})
+        raise ExternalServiceError("pool_timeout")
     except httpx.TimeoutException:
         logger.error("External request timeout", extra={"payload": payload})
         raise ExternalServiceError("timeout")
@@ -37,3 +242,25 @@ async def send_to_external_service(payload: Dict[str, Any], timeout: int = 60) -
     else:
         logger.error("External invalid response", extra={"response": data})
         raise ExternalServiceError("invalid_response")
+
+
+async def send_to_external_service(
+        payload: Dict[str, Any],
+        timeout: int = 60,
+        try_acquire_hedge_slot: Optional[Callable[[], bool]] = None,
+        release_hedge_slot: Optional[Callable[[], None]] = None,
+) -> bool:
+    """Send JSON payload to external service and return success flag, hedging slow calls if enabled.
+
+    A hedge fires only if `try_acquire_hedge_slot` (when given) grants it a slot of its own.
+    """
+    external_url = get_settings().EXTERNAL_SERVICE_URL
+    client = _http_client
+    hedger = get_hedger()
+    if hedger is None:
+        return await post_to_external_service(external_url, payload, timeout, client)
+    return await hedger.call(
+        lambda: post_to_external_service(external_url, payload, timeout, client),
+        try_acquire_slot=try_acquire_hedge_slot,
+        release_slot=release_hedge_slot,
+    )
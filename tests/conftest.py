@@ -2,6 +2,29 @@ import pytest
 import pytest_asyncio
 
 
+@pytest.fixture(autouse=True, scope="function")
+def settings():
+    """Explicit test settings, so the suite does not depend on environment variables or `.env`."""
+    from app.core.config import Settings, set_settings
+
+    test_settings = Settings(
+        _env_file=None,
+        MODE="test",
+        DB_HOST="localhost",
+        DB_PORT=5432,
+        POSTGRES_DB="app",
+        POSTGRES_USER="app",
+        POSTGRES_PASSWORD="app",
+        EXTERNAL_SERVICE_URL="http://localhost:8001/result",
+        LOG_LEVEL="WARNING",
+        LOG_JSON=False,
+        LOG_NAME="app",
+    )
+    set_settings(test_settings)
+    yield test_settings
+    set_settings(None)
+
+
 @pytest.fixture(autouse=True, scope="function")
 def _no_httpx_prod_calls(monkeypatch):
     import httpx
@@ -29,12 +52,12 @@ async def session():
 
 
 @pytest_asyncio.fixture(scope="function")
-def client():
+def client(settings):
     from fastapi.testclient import TestClient
-    from app.main import app
-    from app.query_service.dependencies import get_request_service
+    from app.main import create_app
+    from app.query_service.dependencies import get_latest_service, get_request_service
     from app.query_service.services import RequestService
-    from app.query_service.models import Request
+    from app.query_service.models import Request, LatestResult
 
     class _FakeRepo:
         def __init__(self):
@@ -61,17 +84,39 @@ def client():
             items = [r for r in self.items if r.cadastral_number == cadastral_number]
             return items[offset or 0 : (offset or 0) + (limit or len(items))]
 
+    class _FakeLatestRepo:
+        def __init__(self):
+            self.items = {}
+            self.queries = 0
+
+        async def upsert(self, request: Request) -> None:
+            self.items[request.cadastral_key] = LatestResult(
+                cadastral_key=request.cadastral_key,
+                cadastral_number=request.cadastral_number,
+                request_id=request.id,
+                success=request.success,
+                response=request.response,
+                requested_at=request.created_at,
+            )
+
+        async def get_many(self, cadastral_keys):
+            self.queries += 1
+            return [self.items[k] for k in cadastral_keys if k in self.items]
+
     class _FakeService(RequestService):
-        async def process_request(self, cadastral_number: str, latitude=None, longitude=None):
+        async def process_request(self, cadastral_number: str, latitude=None, longitude=None, deadline=None, client=None):
             req = Request(cadastral_number=cadastral_number, latitude=latitude, longitude=longitude, payload={})
             req = await self.repository.create(req)
-            return await self.repository.update_request_result(request=req, response={"success": True}, success=True)
+            req = await self.repository.update_request_result(request=req, response={"success": True}, success=True)
+            await self._remember_latest(req)
+            return req
 
     repo = _FakeRepo()
-    service = _FakeService(repo)
+    service = _FakeService(repo, _FakeLatestRepo())
 
+    app = create_app(settings)
     app.dependency_overrides[get_request_service] = lambda: service
+    app.dependency_overrides[get_latest_service] = lambda: service
     with TestClient(app) as c:
         yield c
-    app.dependency_overrides.clear()
 
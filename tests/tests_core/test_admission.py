@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.admission import CRITICAL, QUERY, READ, AdmissionController, admission
+from app.core.db import PoolWaitTracker
+from app.core.profiling import loop_lag
+
+
+class TestAdmission:
+    def test_classify(self):
+        """New external calls, reads and everything else fall into separate classes."""
+        assert AdmissionController.classify("POST", "/query") == QUERY
+        assert AdmissionController.classify("GET", "/history/77:01:0001001:1") == READ
+        assert AdmissionController.classify("POST", "/latest") == READ
+        assert AdmissionController.classify("GET", "/ping") == CRITICAL
+
+    def test_reads_have_headroom_over_queries(self, monkeypatch):
+        """Loop lag above the limit sheds queries first and reads only past the headroom."""
+        controller = AdmissionController(enabled=True, max_loop_lag=0.1, read_headroom=2.0)
+        monkeypatch.setattr(loop_lag, "samples", [0.15])
+        assert controller.check(QUERY) == "loop_lag"
+        assert controller.check(READ) is None
+        monkeypatch.setattr(loop_lag, "samples", [0.25])
+        assert controller.check(READ) == "loop_lag"
+        assert controller.check(CRITICAL) is None
+
+    def test_pool_wait_decays_without_traffic(self):
+        """A stale DB wait signal fades so shedding cannot lock itself in."""
+        now = [100.0]
+        tracker = PoolWaitTracker(alpha=1.0, half_life=1.0, clock=lambda: now[0])
+        tracker.observe(0.8)
+        assert tracker.current == 0.8
+        now[0] += 2.0
+        assert tracker.current == 0.2
+
+    @pytest.mark.asyncio
+    async def test_pool_checkout_is_timed_lazily(self, tmp_path, monkeypatch):
+        """Checkout wait is measured by the pool, only when a session actually needs a connection."""
+        import app.core.db as db
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+        tracker = PoolWaitTracker()
+        monkeypatch.setattr(db, "pool_wait", tracker)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", poolclass=db.TimedQueuePool)
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            assert engine.pool.checkedout() == 0
+            await session.execute(text("SELECT 1"))
+            assert engine.pool.checkedout() == 1
+        await engine.dispose()
+        assert tracker.max_wait > 0
+
+    def test_sheds_queries_with_retry_after(self, client: TestClient, monkeypatch):
+        """Answers 503 with Retry-After for new queries at the in-flight limit while cheap endpoints still work."""
+        monkeypatch.setattr(admission, "enabled", True)
+        monkeypatch.setattr(admission, "max_inflight_queries", 1)
+        monkeypatch.setattr(admission, "inflight_queries", 1)
+
+        r = client.post("/query", json={"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0})
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "1"
+        assert r.json()["detail"]["reason"] == "inflight_queries"
+        assert client.get("/ping").status_code == 200
+        assert client.get("/history").status_code == 200
@@ -0,0 +1,59 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.core.profiling import SamplingProfiler, LoopLagMonitor, SlowRequestRecorder, slow_requests
+
+
+class TestProfiling:
+    def test_slow_request_recorder_keeps_slowest(self):
+        """Retains only the `capacity` slowest requests, slowest first."""
+        recorder = SlowRequestRecorder(capacity=3)
+        for duration in [0.1, 0.5, 0.2, 0.9, 0.05, 0.3]:
+            recorder.record("GET", "/history", duration, 200, {"repository_read": duration / 2})
+        assert [e["duration"] for e in recorder.snapshot()] == [0.9, 0.5, 0.3]
+
+    def test_sampling_profiler_collects_collapsed_stacks(self):
+        """Samples a busy thread and reports its frames in collapsed format."""
+        profiler = SamplingProfiler()
+
+        def busy_function():
+            end = time.monotonic() + 0.2
+            while time.monotonic() < end:
+                pass
+
+        profiler.start(duration=1.0, interval=0.005)
+        busy_function()
+        profiler.stop()
+        assert profiler.status()["samples"] > 0
+        assert "busy_function" in profiler.collapsed()
+
+    @pytest.mark.asyncio
+    async def test_loop_lag_monitor_detects_blocking(self):
+        """Reports lag when the event loop is blocked."""
+        monitor = LoopLagMonitor(interval=0.01)
+        await monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+        assert monitor.snapshot()["max"] >= 0.05
+
+    def test_admin_disabled_without_token(self, client: TestClient):
+        """Hides the admin surface when ADMIN_TOKEN is not configured."""
+        assert client.get("/admin/loop-lag").status_code == 404
+
+    def test_admin_requires_token(self, client: TestClient, settings, monkeypatch):
+        """Rejects wrong tokens and serves slow requests with per-stage timings."""
+        monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+        slow_requests.clear()
+        client.post("/query", json={"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0})
+        client.get("/ping")
+
+        assert client.get("/admin/slow-requests", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        r = client.get("/admin/slow-requests", headers={"X-Admin-Token": "secret"})
+        assert r.status_code == 200
+        entries = r.json()
+        assert [e["path"] for e in entries] == ["/query"]
+        assert "framework" in entries[0]["stages"]
+        assert "serialization" in entries[0]["stages"]
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Regression budgets for a cold interpreter; generous enough for slow CI runners.
+IMPORT_BUDGET_SECONDS = 3.0
+COLD_START_BUDGET_SECONDS = 5.0
+
+_SETTINGS_VARS = {
+    "MODE", "DB_HOST", "DB_PORT", "POSTGRES_DB", "POSTGRES_USER", "POSTGRES_PASSWORD",
+    "EXTERNAL_SERVICE_URL", "LOG_LEVEL", "LOG_JSON", "LOG_NAME",
+}
+
+
+def _run(code: str, cwd: Path) -> dict:
+    """Run `code` in a fresh interpreter without settings in the environment and parse its JSON output."""
+    env = {k: v for k, v in os.environ.items() if k not in _SETTINGS_VARS}
+    env["PYTHONPATH"] = str(ROOT)
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+class TestStartup:
+    def test_import_is_side_effect_free(self, tmp_path, record_property):
+        """Importing the app reads no settings and creates no engine, within the import budget."""
+        result = _run(
+            "import json, time\n"
+            "t = time.perf_counter()\n"
+            "import app.main\n"
+            "elapsed = time.perf_counter() - t\n"
+            "from app.core import config, db\n"
+            "print(json.dumps({'elapsed': elapsed, 'settings': config._settings is not None, 'engine': db._engine is not None}))\n",
+            tmp_path,
+        )
+        record_property("import_seconds", result["elapsed"])
+        assert result["settings"] is False
+        assert result["engine"] is False
+        assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+    def test_cold_start_with_explicit_settings(self, tmp_path, record_property):
+        """`create_app(settings)` serves its first request within the cold-start budget."""
+        result = _run(
+            "import json, time\n"
+            "t = time.perf_counter()\n"
+            "from fastapi.testclient import TestClient\n"
+            "from app.core.config import Settings\n"
+            "from app.main import create_app\n"
+            "settings = Settings(MODE='test', DB_HOST='localhost', DB_PORT=5432, POSTGRES_DB='app', POSTGRES_USER='app',\n"
+            "                    POSTGRES_PASSWORD='app', EXTERNAL_SERVICE_URL='http://localhost:8001/result',\n"
+            "                    LOG_LEVEL='WARNING', LOG_JSON=False, LOG_NAME='app')\n"
+            "with TestClient(create_app(settings)) as client:\n"
+            "    status = client.get('/ping').status_code\n"
+            "    elapsed = time.perf_counter() - t\n"
+            "print(json.dumps({'elapsed': elapsed, 'status': status}))\n",
+            tmp_path,
+        )
+        record_property("cold_start_seconds", result["elapsed"])
+        assert result["status"] == 200
+        assert result["elapsed"] < COLD_START_BUDGET_SECONDS
@@ -0,0 +1,28 @@
+import pytest
+from app.query_service.cadastral import parse_cadastral_number, cadastral_key, MAX_PARCEL
+
+
+class TestCadastralNumber:
+    def test_key_is_unique_and_ordered(self):
+        """Packs components into distinct keys ordered like the component tuple."""
+        numbers = ["01:01:0000001:1", "77:01:0001001:2", "77:01:0001001:10", "77:02:0000001:1", "99:99:9999999:%d" % MAX_PARCEL]
+        keys = [parse_cadastral_number(n).key for n in numbers]
+        assert keys == sorted(keys)
+        assert len(set(keys)) == len(keys)
+        assert max(keys) < 2 ** 63
+
+    def test_canonical_round_trip(self):
+        """Canonical form parses back to the same components."""
+        parsed = parse_cadastral_number("77:1:1001:0042")
+        assert parsed.canonical == "77:01:0001001:42"
+        assert parse_cadastral_number(parsed.canonical) == parsed
+
+    def test_cadastral_key_lenient_for_legacy_values(self):
+        """Returns None instead of raising for unparsable legacy numbers."""
+        assert cadastral_key("legacy") is None
+        assert cadastral_key(None) is None
+
+    def test_parcel_out_of_range(self):
+        """Rejects parcels that do not fit the packed layout."""
+        with pytest.raises(ValueError):
+            parse_cadastral_number(f"77:01:0001001:{MAX_PARCEL + 1}")
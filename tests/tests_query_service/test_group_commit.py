@@ -0,0 +1,148 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.core.db import Base
+from app.query_service.group_commit import GroupCommitWriter
+from app.query_service.models import Request
+from app.query_service.repositories import GroupCommitRequestRepository
+
+
+@pytest_asyncio.fixture(scope="function")
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'gc.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+class TestGroupCommitWriter:
+    @pytest.mark.asyncio
+    async def test_concurrent_inserts_share_transactions(self, session_factory, monkeypatch):
+        """Resolves every caller with its own id while flushing in few batches."""
+        writer = GroupCommitWriter(session_factory, max_batch=50, max_delay=0.05)
+        flushed = []
+        original_write = writer._write
+
+        async def counting_write(batch):
+            flushed.append(len(batch))
+            return await original_write(batch)
+
+        monkeypatch.setattr(writer, "_write", counting_write)
+        await writer.start()
+
+        values = [{"cadastral_number": f"N{i}", "latitude": None, "longitude": None, "payload": {}, "response": None, "success": None} for i in range(20)]
+        results = await asyncio.gather(*(writer.insert(v) for v in values))
+        await writer.stop()
+
+        ids = [r[0] for r in results]
+        assert len(set(ids)) == 20
+        assert all(created_at is not None for _, created_at in results)
+        assert sum(flushed) == 20
+        assert len(flushed) < 20
+
+    @pytest.mark.asyncio
+    async def test_failure_reported_to_each_caller(self, session_factory):
+        """Isolates a failing operation and still commits the others."""
+        writer = GroupCommitWriter(session_factory, max_batch=10, max_delay=0.05)
+        await writer.start()
+
+        good = {"cadastral_number": "OK", "latitude": None, "longitude": None, "payload": {}, "response": None, "success": None}
+        bad = dict(good, cadastral_number=None)
+        results = await asyncio.gather(writer.insert(good), writer.insert(bad), return_exceptions=True)
+        await writer.stop()
+
+        assert isinstance(results[0], tuple)
+        assert isinstance(results[1], Exception)
+
+    @pytest.mark.asyncio
+    async def test_repository_create_and_update(self, session_factory):
+        """Writes through the writer and reads back via the session."""
+        writer = GroupCommitWriter(session_factory, max_delay=0.001)
+        await writer.start()
+        async with session_factory() as session:
+            repo = GroupCommitRequestRepository(session, writer)
+            r = await repo.create(Request(cadastral_number="A", payload={}))
+            assert r.id is not None
+            await repo.update_request_result(request=r, response={"success": True}, success=True)
+
+            row = (await session.execute(select(Request).where(Request.id == r.id))).scalar_one()
+            assert row.success is True
+            assert row.response == {"success": True}
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_before_flush_is_not_written(self, session_factory):
+        """An insert whose caller is cancelled while still queued never reaches the table."""
+        writer = GroupCommitWriter(session_factory, max_delay=0.05)
+        await writer.start()
+        task = asyncio.create_task(writer.insert({"cadastral_number": "GONE", "payload": {}}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await writer.stop()
+
+        async with session_factory() as session:
+            assert (await session.execute(select(Request))).scalars().all() == []
+
+    @pytest.mark.asyncio
+    async def test_cancelled_during_write_reports_row(self, session_factory, monkeypatch):
+        """A caller cancelled after its batch started writing still learns the row id so it can mark it."""
+        writer = GroupCommitWriter(session_factory, max_delay=0.001)
+        writing = asyncio.Event()
+        original_write = writer._write
+
+        async def slow_write(batch):
+            writing.set()
+            await asyncio.sleep(0.02)
+            return await original_write(batch)
+
+        monkeypatch.setattr(writer, "_write", slow_write)
+        await writer.start()
+        async with session_factory() as session:
+            request = Request(cadastral_number="LATE", payload={})
+            task = asyncio.create_task(GroupCommitRequestRepository(session, writer).create(request))
+            await writing.wait()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert request.id is not None
+            row = (await session.execute(select(Request).where(Request.id == request.id))).scalar_one()
+            assert row.cadastral_number == "LATE"
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_queries_share_transactions_with_latest_upserts(self, session_factory, monkeypatch):
+        """Concurrent queries write requests, results and latest rows in a few shared transactions only."""
+        from sqlalchemy import event
+        import app.query_service.services as services_mod
+        from app.core.db import LazySession
+        from app.query_service.models import LatestResult
+        from app.query_service.repositories import GroupCommitLatestResultRepository
+        from app.query_service.services import RequestService
+
+        async def fake_send(payload):
+            return True
+
+        monkeypatch.setattr(services_mod, "send_to_external_service", fake_send)
+        commits = []
+        event.listen(session_factory.kw["bind"].sync_engine, "commit", lambda conn: commits.append(1))
+        writer = GroupCommitWriter(session_factory, max_delay=0.02)
+        await writer.start()
+
+        db = LazySession(session_factory)
+        service = RequestService(GroupCommitRequestRepository(db, writer), GroupCommitLatestResultRepository(db, writer))
+        numbers = [f"77:01:0001001:{i % 5}" for i in range(20)]
+        await asyncio.gather(*(service.process_request(n) for n in numbers))
+        await writer.stop()
+
+        assert len(commits) <= 3
+        assert not db.opened
+        async with session_factory() as session:
+            latest = (await session.execute(select(LatestResult))).scalars().all()
+            newest = (await session.execute(select(Request).order_by(Request.id.desc()).limit(1))).scalar_one()
+        assert len(latest) == 5
+        assert max(row.request_id for row in latest) == newest.id
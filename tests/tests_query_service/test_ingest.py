@@ -0,0 +1,145 @@
+import json
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core.db import Base
+from app.query_service.ingest import ingest, validate_batch, read_checkpoint
+from app.query_service.models import Request
+
+
+async def _prepare_db(db_url: str) -> None:
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+async def _count(db_url: str) -> int:
+    engine = create_async_engine(db_url)
+    async with engine.connect() as conn:
+        count = await conn.scalar(select(func.count()).select_from(Request))
+    await engine.dispose()
+    return count
+
+
+class TestIngest:
+    def test_validate_batch_rejects_invalid_rows(self):
+        """Drops rows failing `RequestCreate` rules and keeps the rest."""
+        batch = [
+            (1, {"cadastral_number": "77:01:0001001:1", "latitude": 55.7, "longitude": 37.6}),
+            (2, {"cadastral_number": "77:01:0001001:2", "latitude": 95, "longitude": 37.6}),
+            (3, None),
+            (4, {"cadastral_number": "77:01:0001001:3", "latitude": 1, "longitude": 2, "success": "true"}),
+        ]
+        rows, errors = validate_batch(batch)
+        assert [r["cadastral_number"] for r in rows] == ["77:01:0001001:1", "77:01:0001001:3"]
+        assert rows[1]["success"] is True
+        assert sorted(line for line, _ in errors) == [2, 3]
+
+    def test_validate_batch_rejects_non_object_response(self):
+        """Only JSON objects (inline or as strings) are stored as `response`; other values are rejected per row."""
+        base = {"cadastral_number": "77:01:0001001:1", "latitude": 1, "longitude": 2}
+        batch = [
+            (1, dict(base, response=5)),
+            (2, dict(base, response=True)),
+            (3, dict(base, response=[1, 2])),
+            (4, dict(base, response="[1,2]")),
+            (5, dict(base, response="{broken")),
+            (6, dict(base, response='{"success": true}')),
+            (7, dict(base, response={"success": False})),
+        ]
+        rows, errors = validate_batch(batch)
+        assert [r["response"] for r in rows] == [{"success": True}, {"success": False}]
+        assert sorted(line for line, _ in errors) == [1, 2, 3, 4, 5]
+
+    def test_validate_batch_rejects_unknown_success_values(self):
+        """Only a fixed true/false vocabulary is accepted for `success`; other values are rejected per row."""
+        base = {"cadastral_number": "77:01:0001001:1", "latitude": 1, "longitude": 2}
+        values = ["yes", "F", 0, True, None, "maybe", "2", "abc"]
+        rows, errors = validate_batch([(i, dict(base, success=v)) for i, v in enumerate(values, start=1)])
+        assert [r["success"] for r in rows] == [True, False, False, True, None]
+        assert sorted(line for line, _ in errors) == [6, 7, 8]
+
+    @pytest.mark.asyncio
+    async def test_ingest_jsonl_with_checkpoint_resume(self, tmp_path):
+        """Loads in batches, writes a checkpoint and skips committed lines on rerun."""
+        db_url = f"sqlite+aiosqlite:///{tmp_path / 'ingest.db'}"
+        await _prepare_db(db_url)
+        src = tmp_path / "history.jsonl"
+        lines = [json.dumps({"cadastral_number": f"77:01:0001001:{i}", "latitude": 1.0, "longitude": 2.0}) for i in range(1, 6)]
+        src.write_text("\n".join(lines + ["{broken"]) + "\n", encoding="utf-8")
+
+        report = await ingest(str(src), db_url, batch_size=2)
+        assert report.loaded == 5
+        assert report.rejected == 1
+        assert report.batches == 3
+        assert read_checkpoint(f"{src}.checkpoint") == 6
+
+        again = await ingest(str(src), db_url, batch_size=2)
+        assert again.loaded == 0
+        assert again.skipped == 6
+        assert await _count(db_url) == 5
+
+    @pytest.mark.asyncio
+    async def test_ingest_csv(self, tmp_path):
+        """Parses CSV input with string-typed optional columns."""
+        db_url = f"sqlite+aiosqlite:///{tmp_path / 'ingest.db'}"
+        await _prepare_db(db_url)
+        src = tmp_path / "history.csv"
+        src.write_text(
+            "cadastral_number,latitude,longitude,success,created_at\n"
+            "77:01:0001001:1,55.7,37.6,false,2025-01-01T00:00:00\n"
+            "77:01:0001001:2,55.7,37.6,,\n",
+            encoding="utf-8",
+        )
+
+        report = await ingest(str(src), db_url, resume=False)
+        assert report.loaded == 2
+        assert await _count(db_url) == 2
+
+    @pytest.mark.asyncio
+    async def test_ingest_routes_rows_to_shards(self, tmp_path):
+        """With several URLs every row lands on the shard that owns its cadastral number."""
+        from app.query_service.repositories import shard_index
+
+        urls = [f"sqlite+aiosqlite:///{tmp_path / f'shard{i}.db'}" for i in range(3)]
+        for url in urls:
+            await _prepare_db(url)
+        src = tmp_path / "history.jsonl"
+        numbers = [f"77:01:0001001:{i}" for i in range(1, 13)]
+        src.write_text("\n".join(json.dumps({"cadastral_number": n, "latitude": 1.0, "longitude": 2.0}) for n in numbers) + "\n", encoding="utf-8")
+
+        report = await ingest(str(src), urls, batch_size=5)
+        assert report.loaded == 12
+        expected = [sum(1 for n in numbers if shard_index(n, 3) == i) for i in range(3)]
+        assert [await _count(url) for url in urls] == expected
+
+    @pytest.mark.asyncio
+    async def test_ingest_refreshes_latest_results(self, tmp_path):
+        """Imported history feeds `latest_results` with the newest row per number; older imports never replace it."""
+        from app.query_service.models import LatestResult
+
+        db_url = f"sqlite+aiosqlite:///{tmp_path / 'ingest.db'}"
+        await _prepare_db(db_url)
+
+        def write(name, records):
+            src = tmp_path / name
+            src.write_text("\n".join(json.dumps(dict(r, latitude=1.0, longitude=2.0)) for r in records) + "\n", encoding="utf-8")
+            return str(src)
+
+        first = write("first.jsonl", [
+            {"cadastral_number": "77:01:0001001:1", "success": False, "created_at": "2025-01-01T00:00:00"},
+            {"cadastral_number": "77:1:1001:1", "success": True, "created_at": "2025-03-01T00:00:00"},
+            {"cadastral_number": "77:01:0001001:2", "success": True, "created_at": "2025-02-01T00:00:00"},
+        ])
+        older = write("older.jsonl", [{"cadastral_number": "77:01:0001001:1", "success": False, "created_at": "2024-01-01T00:00:00"}])
+        await ingest(first, db_url, batch_size=2)
+        await ingest(older, db_url)
+
+        engine = create_async_engine(db_url)
+        async with engine.connect() as conn:
+            latest = {r.cadastral_number: r for r in (await conn.execute(select(LatestResult))).all()}
+        await engine.dispose()
+        assert set(latest) == {"77:01:0001001:1", "77:01:0001001:2"}
+        assert latest["77:01:0001001:1"].success is True
+        assert latest["77:01:0001001:1"].requested_at.year == 2025
@@ -31,3 +31,117 @@ class TestSQLAlchemyRequestRepository:
         updated = await repo.update_request_result(request=r1, response={"success": True}, success=True)
         assert updated.success is True
         assert updated.response == {"success": True}
+
+    @pytest.mark.asyncio
+    async def test_get_by_cadastral_uses_packed_key(self, session):
+        """Stores the packed key and finds rows by any spelling of the number."""
+        repo = SQLAlchemyRequestRepository(session)
+        r = await repo.create(Request(cadastral_number="77:01:0001001:12", payload={}))
+        await repo.create(Request(cadastral_number="77:01:0001001:13", payload={}))
+        assert r.cadastral_key is not None
+
+        items = await repo.get_by_cadastral_number("77 01 1001 0012")
+        assert [i.id for i in items] == [r.id]
+
+    @pytest.mark.asyncio
+    async def test_legacy_lookup_uses_partial_index(self, session):
+        """Unparsable legacy numbers are found through the partial index, not a table scan."""
+        from sqlalchemy import text
+
+        repo = SQLAlchemyRequestRepository(session)
+        legacy = await repo.create(Request(cadastral_number="LEGACY-1", payload={}))
+        await repo.create(Request(cadastral_number="77:01:0001001:12", payload={}))
+        assert [i.id for i in await repo.get_by_cadastral_number("LEGACY-1")] == [legacy.id]
+
+        plan = await session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM requests WHERE cadastral_key IS NULL AND cadastral_number = 'LEGACY-1' ORDER BY created_at DESC"
+        ))
+        assert "ix_requests_legacy_number_created_at" in " ".join(str(row[-1]) for row in plan)
+
+
+class TestSQLAlchemyLatestResultRepository:
+    @pytest.mark.asyncio
+    async def test_upsert_keeps_newest_and_bulk_get(self, session):
+        """Upserts per number, ignores older results and fetches many keys at once."""
+        from datetime import datetime, timedelta
+        from app.query_service.repositories import SQLAlchemyLatestResultRepository
+
+        latest = SQLAlchemyLatestResultRepository(session)
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        newer = Request(cadastral_number="77:01:0001001:1", payload={}, response={"success": True}, success=True)
+        newer.id, newer.created_at = 2, now
+        older = Request(cadastral_number="77:01:0001001:1", payload={}, response={"success": False}, success=False)
+        older.id, older.created_at = 1, now - timedelta(minutes=1)
+        other = Request(cadastral_number="77:01:0001001:2", payload={}, response={"success": False}, success=False)
+        other.id, other.created_at = 3, now
+
+        await latest.upsert(newer)
+        await latest.upsert(older)
+        await latest.upsert(other)
+
+        rows = await latest.get_many([newer.cadastral_key, other.cadastral_key, 12345])
+        by_number = {r.cadastral_number: r for r in rows}
+        assert set(by_number) == {"77:01:0001001:1", "77:01:0001001:2"}
+        assert by_number["77:01:0001001:1"].request_id == 2
+        assert by_number["77:01:0001001:1"].success is True
+
+
+class TestShardedRequestRepository:
+    @pytest.mark.asyncio
+    async def test_routing_and_scatter_gather_history(self, tmp_path):
+        """Keeps each number on one shard and merges global history by created_at desc."""
+        from datetime import datetime, timedelta
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+        from app.core.db import Base
+        from app.query_service.repositories import ShardedRequestRepository, shard_index
+        from app.query_service.schemas import RequestRead
+
+        engines, sessions = [], []
+        for i in range(3):
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'shard{i}.db'}")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            engines.append(engine)
+            sessions.append(async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)())
+        repo = ShardedRequestRepository([SQLAlchemyRequestRepository(s) for s in sessions])
+
+        start = datetime(2026, 1, 1)
+        numbers = [f"77:01:0001001:{i % 7}" for i in range(21)]
+        for i, number in enumerate(numbers):
+            await repo.create(Request(cadastral_number=number, payload={}, created_at=start + timedelta(seconds=i)))
+
+        for number in set(numbers):
+            owner = shard_index(number, 3)
+            for i, shard in enumerate(repo.shards):
+                found = await shard.get_by_cadastral_number(number)
+                assert len(found) == (3 if i == owner else 0)
+            assert len(await repo.get_by_cadastral_number(number.replace(":", " "))) == 3
+
+        page = await repo.get_all(limit=5, offset=3)
+        expected = [start + timedelta(seconds=i) for i in range(17, 12, -1)]
+        assert [r.created_at for r in page] == expected
+        assert len(await repo.get_all()) == 21
+        for r in await repo.get_all():
+            assert r.shard == shard_index(r.cadastral_number, 3)
+            assert RequestRead.model_validate(r).shard == r.shard
+
+        for session in sessions:
+            await session.close()
+        for engine in engines:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_sharded_service_leaves_default_db_untouched(self):
+        """With shards configured the lazy default session is never opened."""
+        from app.core.db import LazySession
+        from app.query_service.dependencies import get_request_service
+        from app.query_service.repositories import ShardedRequestRepository
+
+        def _open():
+            raise AssertionError("default DB session opened in sharded mode")
+
+        db = LazySession(_open)
+        service = await get_request_service(db=db, shard_dbs=[object(), object()])
+        assert isinstance(service.repository, ShardedRequestRepository)
+        assert not db.opened
+        await db.close()
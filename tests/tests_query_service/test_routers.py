@@ -1,3 +1,4 @@
+import pytest
 from fastapi.testclient import TestClient
 
 
@@ -10,16 +11,16 @@ class TestRouters:
 
     def test_query_endpoint(self, client: TestClient):
         """Creates request and returns persisted entity."""
-        r = client.post("/query", json={"cadastral_number": "A", "latitude": 1.0, "longitude": 2.0})
+        r = client.post("/query", json={"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0})
         assert r.status_code == 201
         data = r.json()
-        assert data["cadastral_number"] == "A"
+        assert data["cadastral_number"] == "77:01:0001001:1"
         assert data["success"] is True
 
     def test_history_endpoints(self, client: TestClient):
         """Lists all and filtered history entries."""
-        client.post("/query", json={"cadastral_number": "A", "latitude": 1.0, "longitude": 2.0})
-        client.post("/query", json={"cadastral_number": "B", "latitude": 1.0, "longitude": 2.0})
+        client.post("/query", json={"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0})
+        client.post("/query", json={"cadastral_number": "77:01:0001001:2", "latitude": 1.0, "longitude": 2.0})
 
         r_all = client.get("/history?limit=10&offset=0")
         assert r_all.status_code == 200
@@ -27,7 +28,95 @@ class TestRouters:
         assert len(data_all) == 2
         assert all("created_at" in item for item in data_all)
 
-        r_a = client.get("/history/A")
+        r_a = client.get("/history/77-1-1001-1")
         assert r_a.status_code == 200
         items = r_a.json()
-        assert all(item["cadastral_number"] == "A" for item in items)
+        assert len(items) == 1
+        assert all(item["cadastral_number"] == "77:01:0001001:1" for item in items)
+
+    def test_query_rejects_malformed_cadastral_number(self, client: TestClient):
+        """Returns 422 for numbers without the district:area:quarter:parcel structure."""
+        r = client.post("/query", json={"cadastral_number": "A", "latitude": 1.0, "longitude": 2.0})
+        assert r.status_code == 422
+
+    def test_query_invalid_deadline_header(self, client: TestClient):
+        """Rejects a non-numeric timeout header."""
+        r = client.post(
+            "/query",
+            json={"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0},
+            headers={"X-Request-Timeout": "soon"},
+        )
+        assert r.status_code == 400
+
+    def test_query_priority_header(self, client: TestClient):
+        """Accepts the bulk lane and rejects unknown priorities."""
+        body = {"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0}
+        assert client.post("/query", json=body, headers={"X-Request-Priority": "bulk", "X-API-Key": "k"}).status_code == 201
+        assert client.post("/query", json=body, headers={"X-Request-Priority": "urgent"}).status_code == 400
+
+    def test_client_context_prefers_api_key(self):
+        """A keyed caller is identified by its key whatever `X-Client-Id` it sends."""
+        import asyncio
+        from types import SimpleNamespace
+        from app.query_service.dependencies import get_client_context
+
+        http_request = SimpleNamespace(client=SimpleNamespace(host="10.0.0.1"))
+        first = asyncio.run(get_client_context(http_request, x_client_id="a", x_api_key="k", x_request_priority=None))
+        second = asyncio.run(get_client_context(http_request, x_client_id="b", x_api_key="k", x_request_priority=None))
+        assert first.client_id == second.client_id
+        assert first.client_id.startswith("key:")
+        anonymous = asyncio.run(get_client_context(http_request, x_client_id=None, x_api_key=None, x_request_priority="bulk"))
+        assert (anonymous.client_id, anonymous.priority) == ("ip:10.0.0.1", "bulk")
+
+    def test_deadline_from_headers(self):
+        """Uses the earliest of the server default and client-provided limits."""
+        import time
+        from app.query_service.deadlines import Deadline
+
+        assert Deadline.from_headers(60).timeout == 60
+        assert Deadline.from_headers(60, timeout_header="5").timeout == 5
+        assert Deadline.from_headers(60, timeout_header="120").timeout == 60
+        assert Deadline.from_headers(60, deadline_header=str(time.time() - 1)).expired
+
+    def test_latest_endpoints(self, client: TestClient):
+        """Serves single and bulk latest results; unknown numbers are 404 or omitted."""
+        client.post("/query", json={"cadastral_number": "77:01:0001001:1", "latitude": 1.0, "longitude": 2.0})
+        client.post("/query", json={"cadastral_number": "77:01:0001001:2", "latitude": 1.0, "longitude": 2.0})
+
+        r = client.get("/latest/77-1-1001-1")
+        assert r.status_code == 200
+        assert r.json()["cadastral_number"] == "77:01:0001001:1"
+        assert r.json()["success"] is True
+
+        assert client.get("/latest/77:01:0001001:9").status_code == 404
+        assert client.get("/latest/garbage").status_code == 422
+
+        r_bulk = client.post("/latest", json={"cadastral_numbers": ["77:01:0001001:2", "77:01:0001001:9", "77:01:0001001:1"]})
+        assert r_bulk.status_code == 200
+        assert [i["cadastral_number"] for i in r_bulk.json()] == ["77:01:0001001:2", "77:01:0001001:1"]
+
+    def test_latest_service_opens_session_only_on_miss(self, monkeypatch):
+        """A hot-set hit is answered without creating a DB session."""
+        import asyncio
+        from datetime import datetime, timezone
+        import app.query_service.dependencies as deps
+        from app.core.db import LazySession
+        from app.query_service.cache import LRUCache
+        from app.query_service.cadastral import parse_cadastral_number
+        from app.query_service.schemas import LatestRead
+
+        def no_session():
+            raise RuntimeError("session opened")
+
+        monkeypatch.setattr(deps, "_latest_cache", LRUCache(capacity=10))
+        number = "77:01:0001001:1"
+        deps.get_latest_cache().set(parse_cadastral_number(number).key, LatestRead(
+            cadastral_number=number, request_id=1, success=True, requested_at=datetime.now(timezone.utc),
+        ))
+        db = LazySession(no_session)
+        service = asyncio.run(deps.get_latest_service(db=db, shard_dbs=[]))
+
+        assert asyncio.run(service.get_latest(number)).request_id == 1
+        assert not db.opened
+        with pytest.raises(RuntimeError):
+            asyncio.run(service.get_latest("77:01:0001001:2"))
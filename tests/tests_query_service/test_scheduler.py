@@ -0,0 +1,107 @@
+import asyncio
+from collections import Counter
+
+import pytest
+
+from app.query_service.scheduler import BULK, INTERACTIVE, ClientContext, FairScheduler
+
+
+async def _run(scheduler: FairScheduler, clients, order: list, hold: asyncio.Event):
+    """Queue one call per client context behind a held slot, then release it and record grant order."""
+    async def call(client: ClientContext):
+        async with scheduler.slot(client):
+            order.append(client)
+            await asyncio.sleep(0)
+
+    blocker = ClientContext("blocker")
+    await scheduler.acquire(blocker)
+    tasks = [asyncio.create_task(call(c)) for c in clients]
+    await asyncio.sleep(0)
+    hold.set()
+    scheduler.release(blocker)
+    await asyncio.gather(*tasks)
+
+
+class TestFairScheduler:
+    @pytest.mark.asyncio
+    async def test_round_robin_across_clients(self):
+        """A client with a deep backlog does not delay a client with one call."""
+        scheduler = FairScheduler(max_concurrency=1)
+        order = []
+        clients = [ClientContext("heavy")] * 5 + [ClientContext("light")]
+        await _run(scheduler, clients, order, asyncio.Event())
+        assert [c.client_id for c in order[:2]] == ["heavy", "light"]
+        assert scheduler.stats()["clients"]["heavy"]["granted"] == 5
+
+    @pytest.mark.asyncio
+    async def test_weights_share_slots(self):
+        """A client with weight 3 gets three grants per grant of a weight-1 client."""
+        scheduler = FairScheduler(max_concurrency=1, weights={"gold": 3.0})
+        order = []
+        clients = [ClientContext("gold")] * 6 + [ClientContext("basic")] * 6
+        await _run(scheduler, clients, order, asyncio.Event())
+        assert Counter(c.client_id for c in order[:8]) == {"gold": 6, "basic": 2}
+
+    @pytest.mark.asyncio
+    async def test_interactive_before_bulk_without_starvation(self):
+        """Interactive calls go first, but bulk still receives its minimum share."""
+        scheduler = FairScheduler(max_concurrency=1, bulk_share=0.25)
+        order = []
+        clients = [ClientContext("batch", BULK)] * 4 + [ClientContext("ui", INTERACTIVE)] * 8
+        await _run(scheduler, clients, order, asyncio.Event())
+        priorities = [c.priority for c in order]
+        assert priorities[0] == INTERACTIVE
+        assert priorities[:8].count(BULK) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """A caller cancelled while queued frees its place and does not leak a slot."""
+        scheduler = FairScheduler(max_concurrency=1)
+        holder = ClientContext("a")
+        await scheduler.acquire(holder)
+        waiting = asyncio.create_task(scheduler.acquire(ClientContext("b")))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["clients"]["b"]["queued"][INTERACTIVE] == 1
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert scheduler.queued == 0
+        scheduler.release(holder)
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_client_stats_are_capped(self):
+        """Stats of idle clients are evicted oldest first; busy clients are kept."""
+        scheduler = FairScheduler(max_concurrency=10, max_clients=2)
+        busy = ClientContext("busy")
+        await scheduler.acquire(busy)
+        for i in range(5):
+            async with scheduler.slot(ClientContext(f"c{i}")):
+                pass
+        assert list(scheduler.clients) == ["busy", "c4"]
+        scheduler.release(busy)
+        assert scheduler.clients["busy"].in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_try_acquire_never_queues(self):
+        """A non-waiting grant succeeds only with a free slot and an empty queue."""
+        scheduler = FairScheduler(max_concurrency=2)
+        a = ClientContext("a")
+        await scheduler.acquire(a)
+        assert scheduler.try_acquire(a)
+        assert not scheduler.try_acquire(a)
+        assert scheduler.in_flight == 2
+        assert scheduler.queued == 0
+
+        waiting = asyncio.create_task(scheduler.acquire(ClientContext("b")))
+        await asyncio.sleep(0)
+        scheduler.release(a)
+        await waiting
+        assert not scheduler.try_acquire(a)
+        assert scheduler.clients["a"].granted == 2
+        assert scheduler.clients["b"].in_flight == 1
+
+    def test_rejects_non_positive_weights(self):
+        with pytest.raises(ValueError):
+            FairScheduler(max_concurrency=1, weights={"x": 0})
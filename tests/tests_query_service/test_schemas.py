@@ -21,3 +21,15 @@ class TestRequestSchemas:
         """Rejects longitude out of [-180, 180]."""
         with pytest.raises(ValueError):
             RequestCreate(cadastral_number="x", latitude=0, longitude=lon)
+
+    @pytest.mark.parametrize("raw", ["77:01:0001001:1", " 77 : 1 : 1001 : 01 ", "77-01-0001001-1", "77.1.1001.1"])
+    def test_request_create_normalizes_cadastral_number(self, raw):
+        """Canonicalizes spacing, separators and leading zeros."""
+        obj = RequestCreate(cadastral_number=raw, latitude=0, longitude=0)
+        assert obj.cadastral_number == "77:01:0001001:1"
+
+    @pytest.mark.parametrize("raw", ["x", "77:01:0001001", "77:01:0001001:1:2", "777:01:0001001:1", "77:01:abc:1"])
+    def test_request_create_invalid_cadastral_number(self, raw):
+        """Rejects numbers without the district:area:quarter:parcel structure."""
+        with pytest.raises(ValueError):
+            RequestCreate(cadastral_number=raw, latitude=0, longitude=0)
@@ -81,3 +81,94 @@ class TestRequestService:
         by_a = await service.get_history_by_cadastral_number("A")
         assert len(by_a) == 1
         assert by_a[0].cadastral_number == "A"
+
+    @pytest.mark.asyncio
+    async def test_process_request_deadline_exceeded(self, monkeypatch):
+        """Marks the row expired and raises 504 once the deadline passes."""
+        import asyncio
+        from app.query_service.deadlines import Deadline
+
+        async def slow_send(payload):
+            await asyncio.sleep(5)
+            return True
+
+        import app.query_service.services as services_mod
+        monkeypatch.setattr(services_mod, "send_to_external_service", slow_send, raising=True)
+
+        repo = FakeRepo()
+        service = RequestService(repo)
+
+        with pytest.raises(Exception) as ei:
+            await service.process_request("77:01:0001001:1", 0, 0, deadline=Deadline(0.05))
+        assert getattr(ei.value, "status_code", None) == 504
+        assert repo.created[0].response == {"success": None, "error": "deadline_exceeded"}
+
+    @pytest.mark.asyncio
+    async def test_process_request_cancelled(self, monkeypatch):
+        """Marks the row cancelled when the caller is cancelled mid-flight."""
+        import asyncio
+
+        started = asyncio.Event()
+
+        async def slow_send(payload):
+            started.set()
+            await asyncio.sleep(5)
+            return True
+
+        import app.query_service.services as services_mod
+        monkeypatch.setattr(services_mod, "send_to_external_service", slow_send, raising=True)
+
+        repo = FakeRepo()
+        service = RequestService(repo)
+
+        task = asyncio.create_task(service.process_request("77:01:0001001:1", 0, 0))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert repo.created[0].response == {"success": None, "error": "cancelled"}
+
+    @pytest.mark.asyncio
+    async def test_latest_served_from_hot_set(self, monkeypatch):
+        """Writes through to the latest repository and answers repeat lookups from the LRU."""
+        from datetime import datetime, timezone
+        from app.query_service.cache import LRUCache
+        from app.query_service.models import LatestResult
+
+        class FakeLatestRepo:
+            def __init__(self):
+                self.rows = {}
+                self.queries = 0
+
+            async def upsert(self, request):
+                self.rows[request.cadastral_key] = LatestResult(
+                    cadastral_key=request.cadastral_key, cadastral_number=request.cadastral_number,
+                    request_id=request.id, success=request.success, response=request.response,
+                    requested_at=request.created_at,
+                )
+
+            async def get_many(self, keys):
+                self.queries += 1
+                return [self.rows[k] for k in keys if k in self.rows]
+
+        async def fake_send(payload):
+            return True
+
+        import app.query_service.services as services_mod
+        monkeypatch.setattr(services_mod, "send_to_external_service", fake_send, raising=True)
+
+        class TimestampRepo(FakeRepo):
+            async def create(self, request):
+                request.created_at = datetime.now(timezone.utc)
+                return await super().create(request)
+
+        latest = FakeLatestRepo()
+        service = RequestService(TimestampRepo(), latest, LRUCache(capacity=10))
+        await service.process_request("77:01:0001001:1", 0, 0)
+
+        cold = RequestService(TimestampRepo(), latest, LRUCache(capacity=10))
+        first = await cold.get_latest_many(["77:01:0001001:1", "77:01:0001001:2"])
+        second = await cold.get_latest("77:01:0001001:1")
+        assert [i.request_id for i in first] == [1]
+        assert second.success is True
+        assert latest.queries == 1
@@ -70,4 +70,136 @@ class TestExternalUtils:
             await send_to_external_service({})
         assert "http_error" in str(ei.value)
 
+    @pytest.mark.asyncio
+    async def test_shared_client_pool_is_unbounded(self, monkeypatch):
+        """The shared client has no 100-connection cap and reports pool waits separately."""
+        import httpx
+        from app.query_service import utils
+
+        client = await utils.start_http_client(pool_timeout=2.0)
+        try:
+            assert client._transport._pool._max_connections > 100
+            assert client.timeout.pool == 2.0
+
+            async def fake_post(self, url, json):
+                raise httpx.PoolTimeout("pool")
+
+            monkeypatch.setattr(httpx.AsyncClient, "post", fake_post, raising=True)
+            with pytest.raises(ExternalServiceError) as ei:
+                await send_to_external_service({})
+            assert str(ei.value) == "pool_timeout"
+        finally:
+            await utils.stop_http_client()
+
+
+class TestRequestHedger:
+    @staticmethod
+    def _warm_hedger(tokens: float):
+        from app.query_service.utils import RequestHedger, LatencyTracker
+
+        tracker = LatencyTracker(min_samples=5)
+        for _ in range(10):
+            tracker.observe(0.01)
+        return RequestHedger(percentile=90, budget_ratio=0.0, min_delay=0.01, tracker=tracker, initial_budget=tokens)
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_on_slow_primary(self):
+        """Fires a second call after the percentile delay and returns the faster answer."""
+        import asyncio
+        import time
+
+        hedger = self._warm_hedger(tokens=1.0)
+        calls = []
+
+        async def factory():
+            calls.append(len(calls))
+            await asyncio.sleep(1.0 if len(calls) == 1 else 0.01)
+            return len(calls)
+
+        started = time.perf_counter()
+        result = await hedger.call(factory)
+        assert time.perf_counter() - started < 0.5
+        assert result == 2
+        assert hedger.stats.hedges == 1
+        assert hedger.stats.hedge_wins == 1
+        await asyncio.sleep(0)
+        # Warm-up samples, the winning hedge and the cancelled primary as a lower bound.
+        assert len(hedger.tracker.samples) == 12
+        assert hedger.tracker.samples[-1] >= hedger.tracker.samples[-2]
+
+    @pytest.mark.asyncio
+    async def test_budget_exhausted_waits_for_primary(self):
+        """Does not hedge when the extra-load budget is spent."""
+        import asyncio
+
+        hedger = self._warm_hedger(tokens=0.0)
 
+        async def factory():
+            await asyncio.sleep(0.05)
+            return True
+
+        assert await hedger.call(factory) is True
+        assert hedger.stats.hedges == 0
+        assert hedger.stats.budget_exhausted == 1
+
+    @pytest.mark.asyncio
+    async def test_hedge_needs_a_free_slot(self):
+        """No hedge fires without a concurrency slot; a granted slot is returned when the hedge ends."""
+        import asyncio
+
+        async def factory():
+            await asyncio.sleep(0.05)
+            return True
+
+        hedger = self._warm_hedger(tokens=5.0)
+        assert await hedger.call(factory, try_acquire_slot=lambda: False, release_slot=lambda: None) is True
+        assert (hedger.stats.hedges, hedger.stats.no_slot) == (0, 1)
+
+        released = []
+        assert await hedger.call(factory, try_acquire_slot=lambda: True, release_slot=lambda: released.append(1)) is True
+        await asyncio.sleep(0.01)
+        assert hedger.stats.hedges == 1
+        assert released == [1]
+
+    @pytest.mark.asyncio
+    async def test_failed_calls_are_observed(self):
+        """A call failing with a timeout still contributes its elapsed time to the latency history."""
+        import asyncio
+        from app.query_service.utils import ExternalServiceError
+
+        hedger = self._warm_hedger(tokens=0.0)
+
+        async def factory():
+            await asyncio.sleep(0.05)
+            raise ExternalServiceError("timeout")
+
+        with pytest.raises(ExternalServiceError):
+            await hedger.call(factory)
+        assert len(hedger.tracker.samples) == 11
+        assert hedger.tracker.samples[-1] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_hedging_cuts_tail_latency(self):
+        """Heavy-tailed latency: hedged p99 stays far below the slow-call latency."""
+        import asyncio
+        import time
+        from app.query_service.utils import RequestHedger, LatencyTracker
+
+        counter = {"n": 0}
+
+        async def factory():
+            counter["n"] += 1
+            await asyncio.sleep(0.5 if counter["n"] % 10 == 0 else 0.005)
+            return True
+
+        hedger = RequestHedger(percentile=80, budget_ratio=0.2, min_delay=0.005, tracker=LatencyTracker(min_samples=10))
+        latencies = []
+        for _ in range(60):
+            started = time.perf_counter()
+            await hedger.call(factory)
+            latencies.append(time.perf_counter() - started)
+
+        tail = sorted(latencies[20:])[-3:]
+        assert hedger.stats.hedge_wins >= 1
+        assert max(tail) < 0.5
+        assert hedger.stats.hedges <= 0.2 * hedger.stats.calls + hedger.budget.burst